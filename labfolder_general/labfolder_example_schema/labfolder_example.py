@@ -37,6 +37,11 @@ class RepeatFromTable(ArchiveSection):
     value = Quantity(type=float, unit='g')
 
 
+class ColumnsFromTable(ArchiveSection):
+    name = Quantity(type=str, shape=['*'])
+    value = Quantity(type=float, shape=['*'], unit='g')
+
+
 class SeparateArchive(EntryData):
     name = Quantity(type=str)
     value = Quantity(type=float, unit='s')
@@ -47,6 +52,7 @@ class LabfolderImportExample(EntryData):
     quantity_2 = Quantity(type=str)
     text_field = Quantity(type=str)
     from_table = SubSection(section_def=RepeatFromTable, repeats=True)
+    table_columns = SubSection(section_def=ColumnsFromTable)
     reference = Quantity(
         type=SeparateArchive,
         a_eln=ELNAnnotation(
@@ -0,0 +1,184 @@
+"""
+A local stand-in for the parts of the Labfolder API v2 used by the import, to
+test and benchmark the import without network access.
+
+Run it on a project dump with
+
+    python -m labfolder_plugin.fake_labfolder project.json --port 8000
+
+where project.json holds the 'entries' (as returned by /entries, including
+their element stubs) and the 'elements' (the element versions by their API
+path, e.g. 'data/12/version/34').
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = '/api/v2'
+ELEMENT_RE = re.compile(r'^/elements/(?P<path>[\w-]+/[^/]+/version/[^/]+)$')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: '_Server'
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _send(self, status: int, body=None, headers: Optional[dict] = None) -> None:
+        content = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _route(self) -> Optional[str]:
+        labfolder = self.server.labfolder
+        if labfolder.latency:
+            time.sleep(labfolder.latency)
+        url = urlparse(self.path)
+        if not url.path.startswith(API_PREFIX):
+            self._send(404)
+            return None
+        path = url.path[len(API_PREFIX) :]
+        labfolder.requests[self.command + ' ' + path] += 1
+        if path != '/auth/login' and self.headers.get('Authorization') != (
+            'Token ' + labfolder.token
+        ):
+            self._send(401, dict(message='not logged in'))
+            return None
+        return path
+
+    def do_POST(self):
+        path = self._route()
+        if path == '/auth/login':
+            self._send(200, dict(token=self.server.labfolder.token))
+        elif path == '/auth/logout':
+            self._send(200)
+        elif path is not None:
+            self._send(404)
+
+    def do_GET(self):
+        labfolder = self.server.labfolder
+        path = self._route()
+        if path is None:
+            return
+        if path == '/entries':
+            query = parse_qs(urlparse(self.path).query)
+            project_ids = ','.join(query.get('project_ids', [])).split(',')
+            body = [
+                entry
+                for entry in labfolder.entries
+                if str(entry.get('project_id')) in project_ids
+            ]
+            if 'limit' in query:
+                offset = int(query.get('offset', ['0'])[0])
+                body = body[offset : offset + int(query['limit'][0])]
+            etag = '"' + hashlib.sha256(json.dumps(body).encode()).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, headers=dict(ETag=etag))
+            else:
+                self._send(200, body, headers=dict(ETag=etag))
+            return
+        match = ELEMENT_RE.match(path)
+        if match and labfolder.take_failure():
+            self._send(503, dict(message='temporarily unavailable'))
+        elif match and match.group('path') in labfolder.elements:
+            self._send(200, labfolder.elements[match.group('path')])
+        else:
+            self._send(404)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    labfolder: 'FakeLabfolder'
+
+
+class FakeLabfolder:
+    """
+    Serves Labfolder projects from memory on a local port. Every response is
+    delayed by `latency` seconds, and the number of requests per method and
+    path is counted in `requests`. The first `failures` element requests are
+    answered with 503. Any credentials are accepted.
+    """
+
+    def __init__(
+        self,
+        entries: list,
+        elements: dict,
+        latency: float = 0.0,
+        port: int = 0,
+        failures: int = 0,
+    ):
+        self.entries = entries
+        self.elements = elements
+        self.latency = latency
+        self.failures = failures
+        self._lock = threading.Lock()
+        self.token = 'fake-labfolder-token'
+        self.requests = Counter()
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.labfolder = self
+        self._thread = None
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.failures <= 0:
+                return False
+            self.failures -= 1
+            return True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return 'http://' + host + ':' + str(port)
+
+    def project_url(self, project_id='1') -> str:
+        return self.url + '/eln/notebook#?projectIds=' + str(project_id)
+
+    def start(self) -> 'FakeLabfolder':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeLabfolder':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('project', help='JSON file with "entries" and "elements".')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    with open(args.project) as f:
+        project = json.load(f)
+    labfolder = FakeLabfolder(
+        project['entries'], project['elements'], args.latency, args.port
+    )
+    print('Serving ' + labfolder.project_url())
+    try:
+        labfolder._server.serve_forever()
+    except KeyboardInterrupt:
+        labfolder._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,54 @@
+from typing import Optional
+
 from nomad.config.models.plugins import SchemaPackageEntryPoint
 from pydantic import Field
 
 
 class NewSchemaPackageEntryPoint(SchemaPackageEntryPoint):
     parameter: int = Field(0, description='Custom configuration parameter')
+    mapping_cache_size: int = Field(
+        32, description='Number of compiled mapping files kept in memory.'
+    )
+    fetch_cache_dir: Optional[str] = Field(
+        None,
+        description='Directory in which the responses of the Labfolder API are '
+        'cached. Versioned elements are then only fetched once, the entry lists '
+        'are refetched conditionally.',
+    )
+    fetch_offline: bool = Field(
+        False,
+        description='Replays the cached Labfolder responses from fetch_cache_dir '
+        'without contacting the Labfolder server. Responses are only replayed '
+        'for the credentials they were fetched with.',
+    )
+    fetch_workers: int = Field(
+        1,
+        description='Number of concurrent requests fetching a Labfolder project. '
+        'With more than one, entries and elements are fetched concurrently over '
+        'a pooled session.',
+    )
+    fetch_retries: int = Field(
+        3, description='Retries of failed requests in the concurrent fetch.'
+    )
+    fetch_backoff: float = Field(
+        0.5,
+        description='Backoff factor in seconds between the retries of the '
+        'concurrent fetch.',
+    )
+    fetch_page_size: int = Field(
+        50, description='Number of entries requested per page by the concurrent fetch.'
+    )
+    instrumentation: bool = Field(
+        False,
+        description='Logs the durations of the import phases and counters of the '
+        'converted elements, rows, fields and archives.',
+    )
+    profile_entry_id: Optional[str] = Field(
+        None,
+        description='Id of a Labfolder entry whose conversion is profiled with '
+        'cProfile. The stats are written to labfolder_profile_<id>.prof in the '
+        'upload.',
+    )
 
     def load(self):
         from labfolder_plugin.schema_packages.schema_package import m_package
@@ -0,0 +1,73 @@
+import numpy as np
+from nomad.metainfo.data_type import ExactNumber, Number
+from nomad.units import ureg
+
+
+def is_numeric(definition) -> bool:
+    return definition is not None and isinstance(definition.type, Number)
+
+
+def is_integer(definition) -> bool:
+    return definition is not None and isinstance(definition.type, ExactNumber)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def to_float_array(values: list) -> tuple:
+    """
+    Coerces the cell values of a table column to floats in one go. Returns the
+    array and a mask of the cells holding a number, the others are NaN.
+    """
+    try:
+        array = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        array = np.array([_to_float(value) for value in values], dtype=float)
+    return array, ~np.isnan(array)
+
+
+def convert_column(values: list, definition, unit=None) -> tuple:
+    """
+    Converts the raw cell values of a table column for the quantity
+    `definition`. Columns of numeric quantities become an array in the unit of
+    the quantity, converted from `unit` if given. Other columns are kept as
+    they are. Returns the values and a mask of the usable cells, which for
+    integer quantities excludes cells not holding a whole number.
+    """
+    if not is_numeric(definition):
+        valid = [value is not None for value in values]
+        if definition is not None and definition.shape:
+            values = ['' if value is None else value for value in values]
+        return values, valid
+    array, valid = to_float_array(values)
+    if unit and definition.unit is not None:
+        array = ureg.Quantity(array, unit).to(definition.unit).magnitude
+    if is_integer(definition):
+        # Cells not holding a whole number are not truncated but invalid. They
+        # are 0 in the array and must not be stored, see `valid`.
+        rounded = np.round(np.where(valid, array, 0))
+        valid &= np.isclose(array, rounded, rtol=1e-9, atol=0)
+        array = np.where(valid, rounded, 0).astype(np.int64)
+    return array, valid
+
+
+class ColumnCache:
+    """
+    The converted columns of the tables of one entry, so that classes
+    repeating per line convert every mapped column only once.
+    """
+
+    def __init__(self):
+        self._columns = dict()
+
+    def get(self, table, rule, definition) -> tuple:
+        key = (id(table), rule)
+        if key not in self._columns:
+            self._columns[key] = convert_column(
+                table.column(rule.path[1]), definition, rule.unit
+            )
+        return self._columns[key]
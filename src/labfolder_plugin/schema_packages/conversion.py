@@ -0,0 +1,481 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from labfolder_plugin.schema_packages.columns import ColumnCache, is_integer
+from labfolder_plugin.schema_packages.elements import (
+    ElementCollector,
+    index_data_content,
+    resolve_data_rules,
+)
+from labfolder_plugin.schema_packages.instrumentation import ImportMetrics
+from labfolder_plugin.schema_packages.setters import AUTO_SETTER
+from labfolder_plugin.schema_packages.templates import ENTRY_FIELDS
+
+try:
+    from importlib.metadata import version
+
+    PLUGIN_VERSION = version('nomad-labfolder-plugin')
+except Exception:
+    PLUGIN_VERSION = 'unknown'
+
+
+@dataclass
+class PendingArchive:
+    """
+    Sections of an 'Archive' type class that still have to be written to
+    their own archive files and referenced from `attribute` of the main section.
+    """
+
+    attribute: str
+    repeats: bool
+    archives: list = field(default_factory=list)
+
+
+@dataclass
+class EntryConversion:
+    """
+    The result of converting one Labfolder entry into NOMAD sections.
+    Nothing is written to the upload until `write_conversion` buffers it in
+    an `ArchiveWriter` and the writer is flushed.
+    """
+
+    entry_id: str
+    title: Optional[str] = None
+    status: str = 'success'
+    message: Optional[str] = None
+    section: Any = None
+    name: Optional[str] = None
+    pending_archives: list = field(default_factory=list)
+    log: Any = None
+    metrics: ImportMetrics = field(default_factory=lambda: ImportMetrics(False))
+
+
+def fingerprint_entry(entry, plan) -> str:
+    """
+    A hash of everything the conversion of the entry depends on: the metadata
+    available to name templates, the tags and element contents of the entry,
+    the mapping file and the plugin version.
+    """
+    sha = hashlib.sha256()
+    sha.update(PLUGIN_VERSION.encode())
+    sha.update(plan.digest.encode())
+    metadata = {name: getattr(entry, name, None) for name in ENTRY_FIELDS}
+    sha.update(json.dumps(metadata, sort_keys=True, default=str).encode())
+    sha.update(json.dumps(sorted(entry.tags or [])).encode())
+    for element in entry.elements:
+        content = dict(
+            type=element.element_type,
+            title=getattr(element, 'title', None),
+            content=getattr(element, 'content', None),
+            data=getattr(element, 'labfolder_data', None),
+        )
+        sha.update(json.dumps(content, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
+
+
+def count_repeats(
+    section_plan, table_content: dict, columnar: frozenset = frozenset()
+) -> int:
+    """
+    The number of instances of a mapped class: one per row of the longest
+    table it maps from for 'per line' classes, a single one otherwise. Tables
+    in `columnar` are stored as columns instead, a class mapping only such
+    tables gets no instance.
+    """
+    if section_plan.repeats != 'per line':
+        return 1
+    titles = {rule.path[0] for rule in section_plan.table_rules}
+    if titles and titles <= columnar:
+        return 0
+    rows = [
+        len(table)
+        for title in titles - columnar
+        for table in table_content.get(title, ())
+    ]
+    return max(rows + [1])
+
+
+def columnar_tables(plan, table_content: dict) -> frozenset:
+    """
+    The titles of the tables stored as columns, as they reach the size given
+    in the 'Table storage' block of the mapping.
+    """
+    return frozenset(
+        title
+        for title, min_rows in plan.table_storage.items()
+        if any(len(table) >= min_rows for table in table_content.get(title, ()))
+    )
+
+
+def stores_columns_only(section_plan, columnar: frozenset) -> bool:
+    """
+    Whether the class only stores the columns of tables that are not stored
+    as columns in this entry, and therefore gets no instance.
+    """
+    return (
+        bool(section_plan.columnar_tables)
+        and not section_plan.columnar_tables & columnar
+        and not section_plan.data_rules
+        and not section_plan.text_rules
+        and all(rule.columnar for rule in section_plan.table_rules)
+    )
+
+
+def render_name(  # noqa: PLR0913, PLR0917
+    section_plan,
+    data_index: dict,
+    entry,
+    table_content: dict,
+    repcount: int,
+    conversion: EntryConversion,
+) -> str:
+    """
+    Renders the compiled name template of a mapped class for one repeat. An
+    incomplete archive name fails the conversion, so that no archive is
+    written under a partial name.
+    """
+    row = None
+    if section_plan.name_template.row_columns:
+        row = dict()
+        for title in {rule.path[0] for rule in section_plan.table_rules}:
+            for table in table_content.get(title, ()):
+                if repcount < len(table):
+                    row.update(table[repcount])
+    missing = []
+    name = section_plan.name_template.render(data_index, entry, row, missing)
+    if missing:
+        message = (
+            'The name of '
+            + section_plan.name
+            + ' could not be filled from '
+            + ', '.join(missing)
+            + '.'
+        )
+        if section_plan.type in ('main', 'Archive'):
+            conversion.log.error(message)
+            conversion.status = 'failed'
+            conversion.message = message
+        else:
+            conversion.log.warning(message)
+    return name
+
+
+def map_table_rule(  # noqa: PLR0913, PLR0917
+    section_object,
+    rule,
+    definition,
+    table,
+    repcount: int,
+    columns: ColumnCache,
+    conversion,
+) -> None:
+    """
+    Sets the quantity `definition` of a table rule from the converted column:
+    the whole column for array quantities, the cell of row `repcount`
+    otherwise. Invalid cells are reported; they are left unset in a single
+    value and NaN in a float array, while an integer array is not set at all.
+    """
+    title, column = rule.path
+    array = definition is not None and bool(definition.shape)
+    if not array and repcount >= len(table):
+        return
+    try:
+        values, valid = columns.get(table, rule, definition)
+        if array and not all(valid):
+            invalid_rows = [str(row + 1) for row, ok in enumerate(valid) if not ok]
+            conversion.metrics.count('fields_failed', len(invalid_rows))
+            conversion.log.warning(
+                'Table entries with key '
+                + title
+                + column
+                + ' in rows '
+                + ', '.join(invalid_rows)
+                + ' are empty or not a number.'
+            )
+            if is_integer(definition):
+                conversion.log.warning(
+                    'The integer quantity '
+                    + rule.key
+                    + ' cannot hold the invalid entries of '
+                    + title
+                    + column
+                    + ' and is not set.'
+                )
+                return
+        if not array and not valid[repcount]:
+            conversion.metrics.count('fields_failed')
+            conversion.log.warning(
+                'Table entry with key '
+                + title
+                + column
+                + ' in row '
+                + str(repcount + 1)
+                + ' is empty or not a number.'
+            )
+            return
+        setattr(section_object, rule.key, values if array else values[repcount])
+        conversion.metrics.count('fields_mapped')
+    except Exception as error:
+        conversion.metrics.count('fields_failed')
+        conversion.log.warning(
+            'Table entry with key '
+            + title
+            + column
+            + ' could not be parsed with error: '
+            + str(error)
+        )
+
+
+def convert_entry(  # noqa: PLR0912, PLR0915
+    entry, plan, logger, instrument: bool = False
+) -> EntryConversion:
+    """
+    Converts a Labfolder entry into the sections defined in the mapping plan.
+    With `instrument`, the phase durations and counters are
+    recorded in the `metrics` of the conversion.
+    """
+    conversion = EntryConversion(
+        entry_id=str(entry.id),
+        title=entry.title,
+        log=logger,
+        metrics=ImportMetrics(instrument),
+    )
+    metrics = conversion.metrics
+
+    classes = plan.classes
+    possible_classes = list(set(classes) & set(entry.tags or []))
+    if len(possible_classes) == 0:
+        logger.warning(
+            'No suitable class found in the LabFolderEntry tags. '
+            'Use one of the following: ' + str(list(classes))
+        )
+        conversion.status = 'skipped'
+        conversion.message = 'No suitable class found in the entry tags.'
+        return conversion
+    if len(possible_classes) > 1:
+        logger.warning(
+            'Too many suitable class found in the LabFolderEntry tags. '
+            'Use only one of the following: ' + str(list(classes))
+        )
+        conversion.status = 'failed'
+        conversion.message = 'Too many suitable classes found in the entry tags.'
+        return conversion
+    labfolder_section = classes[possible_classes[0]]()
+    logger.info(possible_classes[0] + ' template found.')
+    with metrics.phase('flatten'):
+        collector = ElementCollector(
+            plan.table_columns, plan.data_paths, plan.text_titles
+        )
+        for element in entry.elements:
+            metrics.count('elements.' + str(element.element_type))
+            collector.add(element)
+        data_index = index_data_content(collector.data, plan.data_paths)
+        data_values = resolve_data_rules(plan, data_index)
+    if collector.skipped:
+        for kind, count in collector.skipped.items():
+            metrics.count('skipped.' + kind, count)
+        logger.debug(
+            'Labfolder elements not referenced by the mapping were skipped.',
+            data=dict(skipped=collector.skipped),
+        )
+    for kind, key in collector.collisions:
+        logger.warning(
+            'The key '
+            + key
+            + ' is set by more than one '
+            + kind
+            + ' element, the last one is used.'
+        )
+    table_content = collector.tables
+    text_content = collector.texts
+    columns = ColumnCache()
+    for title, tables in table_content.items():
+        metrics.count('table_rows.' + title, sum(len(table) for table in tables))
+    columnar = columnar_tables(plan, table_content)
+    if columnar:
+        metrics.count('tables_columnar', len(columnar))
+
+    for section, section_plan in plan.sections.items():
+        if section_plan.type == 'main' and section != possible_classes[0]:
+            continue
+        if section_plan.section_class is None and section_plan.type != 'main':
+            logger.warning(
+                'The class ' + section_plan.class_path + ' is not available.'
+            )
+            continue
+        if (
+            section_plan.type != 'main'
+            and possible_classes[0] not in section_plan.main_classes
+        ):
+            continue
+        if stores_columns_only(section_plan, columnar):
+            continue
+        setters = section_plan.setters
+        replist = []
+        for repcount in range(count_repeats(section_plan, table_content, columnar)):
+            if section_plan.type == 'main':
+                section_object = labfolder_section
+            else:
+                section_object = section_plan.section_class()
+
+            with metrics.phase('setattr'):
+                for rule, value in data_values[section]:
+                    setter = setters.get(rule.key, AUTO_SETTER)
+                    if setter is None:
+                        continue
+                    if value is None:
+                        metrics.count('fields_failed')
+                        logger.warning(
+                            'JSON entry with key '
+                            + '.'.join(rule.path)
+                            + ' was not found in the Labfolder entry.'
+                        )
+                        continue
+                    try:
+                        setattr(section_object, rule.key, setter.convert(value))
+                        metrics.count('fields_mapped')
+                    except Exception as error:
+                        metrics.count('fields_failed')
+                        logger.warning(
+                            'JSON entry with key '
+                            + '.'.join(rule.path)
+                            + ' could not be parsed with error: '
+                            + str(error)
+                        )
+
+                for rule in section_plan.text_rules:
+                    text = text_content.get(rule.path[0])
+                    if setters.get(rule.key, AUTO_SETTER) is None:
+                        continue
+                    if text is None:
+                        metrics.count('fields_failed')
+                        logger.warning(
+                            'Text entry with key '
+                            + rule.path[0]
+                            + ' was not found in the Labfolder entry.'
+                        )
+                        continue
+                    try:
+                        setattr(section_object, rule.key, text.body(rule.text_format))
+                        metrics.count('fields_mapped')
+                    except Exception as error:
+                        metrics.count('fields_failed')
+                        logger.warning(
+                            'Text entry with key '
+                            + rule.path[0]
+                            + ' could not be parsed with error: '
+                            + str(error)
+                        )
+
+            with metrics.phase('tables'):
+                for rule in section_plan.table_rules:
+                    if rule.columnar != (rule.path[0] in columnar):
+                        continue
+                    setter = setters.get(rule.key, AUTO_SETTER)
+                    if setter is None:
+                        continue
+                    for table in table_content.get(rule.path[0], ()):
+                        map_table_rule(
+                            section_object,
+                            rule,
+                            setter.definition,
+                            table,
+                            repcount,
+                            columns,
+                            conversion,
+                        )
+
+            # The name of the main section is rendered once, after the loop.
+            if section_plan.name_template and section_plan.type != 'main':
+                name = render_name(
+                    section_plan, data_index, entry, table_content, repcount, conversion
+                )
+                section_object.name = name
+
+            if section_plan.type == 'Archive':
+                section_object = (section_object, name)
+
+            replist.append(section_object)
+        logger.debug(
+            'Created ' + section_plan.type + ' ' + section + '.',
+            data=dict(count=len(replist)),
+        )
+
+        if section_plan.type == 'main' or not replist:
+            continue
+        if section_plan.type == 'Archive':
+            conversion.pending_archives.append(
+                PendingArchive(
+                    attribute=section_plan.attribute,
+                    repeats=section_plan.repeats != 'false',
+                    archives=replist,
+                )
+            )
+        elif section_plan.repeats == 'false':
+            setattr(labfolder_section, section_plan.attribute, replist[0])
+        else:
+            setattr(labfolder_section, section_plan.attribute, replist)
+
+    conversion.name = render_name(
+        plan.sections[possible_classes[0]],
+        data_index,
+        entry,
+        table_content,
+        0,
+        conversion,
+    )
+    if conversion.status == 'failed':
+        return conversion
+    labfolder_section.name = conversion.name
+    conversion.section = labfolder_section
+    return conversion
+
+
+def _safe_convert_entry(
+    entry, plan, logger, instrument: bool = False
+) -> EntryConversion:
+    try:
+        return convert_entry(entry, plan, logger, instrument)
+    except Exception as error:
+        logger.error(
+            'The entry ' + str(entry.id) + ' could not be imported.', exc_info=error
+        )
+        return EntryConversion(
+            entry_id=str(entry.id),
+            title=entry.title,
+            status='failed',
+            message=str(error),
+            log=logger,
+        )
+
+
+def convert_entries(entries: list, plan, logger, instrument: bool = False) -> list:
+    """
+    Converts the entries in the order of `entries`.
+    """
+    return [_safe_convert_entry(entry, plan, logger, instrument) for entry in entries]
+
+
+def write_conversion(conversion: EntryConversion, writer) -> list:
+    """
+    Buffers the separate archives and the main archive of a successful
+    conversion in the archive writer, sets the references to the separate
+    archives and returns the names of all archives. Raises an
+    `ArchiveNameCollision` if one of the archive names is already used by
+    another entry or file.
+    """
+    file_names = [
+        name for pending in conversion.pending_archives for _, name in pending.archives
+    ] + [conversion.name]
+    writer.reserve(file_names, conversion.entry_id)
+    for pending in conversion.pending_archives:
+        references = [writer.add(section, name) for section, name in pending.archives]
+        setattr(
+            conversion.section,
+            pending.attribute,
+            references if pending.repeats else references[0],
+        )
+    writer.add(conversion.section, conversion.name)
+    return file_names
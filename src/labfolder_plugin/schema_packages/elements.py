@@ -0,0 +1,311 @@
+from functools import cached_property
+from html.parser import HTMLParser
+from typing import Optional
+
+
+def _index_key(key) -> tuple:
+    key = str(key)
+    return (0, int(key), '') if key.isdigit() else (1, 0, key)
+
+
+class LabfolderTable:
+    """
+    One sheet of a Labfolder table element. The first row (by numeric row
+    index) holds the column headers, every further row is read on access as a
+    dictionary keyed by these headers. Only the `columns` given are read, the
+    others are only counted in `skipped_columns`. The rows are only
+    sorted once they are accessed.
+    """
+
+    def __init__(self, name: str, data_table: dict, columns=None):
+        self.name = name
+        self._data_table = data_table
+        self._header_key = min(data_table, key=_index_key) if data_table else None
+        header = data_table[self._header_key] if data_table else dict()
+        self.columns = dict()
+        self.skipped_columns = 0
+        for column in sorted(header, key=_index_key):
+            value = header[column].get('value')
+            if columns is None or value in columns:
+                self.columns[column] = value
+            else:
+                self.skipped_columns += 1
+
+    @cached_property
+    def _row_keys(self) -> list:
+        return sorted(
+            (key for key in self._data_table if key != self._header_key),
+            key=_index_key,
+        )
+
+    def __len__(self) -> int:
+        return len(self._row_keys)
+
+    def __getitem__(self, index: int) -> dict:
+        row = self._data_table[self._row_keys[index]]
+        return {
+            header: row[column].get('value')
+            for column, header in self.columns.items()
+            if column in row
+        }
+
+    def __iter__(self):
+        for index in range(len(self._row_keys)):
+            yield self[index]
+
+    def column(self, header: str) -> list:
+        """
+        The values of all rows in the column with the given header, `None` for
+        missing cells.
+        """
+        keys = [column for column, name in self.columns.items() if name == header]
+        if not keys:
+            return [None] * len(self._row_keys)
+        key = keys[-1]
+        return [
+            self._data_table[row].get(key, dict()).get('value')
+            for row in self._row_keys
+        ]
+
+
+BLOCK_TAGS = {
+    'p',
+    'div',
+    'li',
+    'ul',
+    'ol',
+    'tr',
+    'table',
+    'blockquote',
+    'pre',
+    'h1',
+    'h2',
+    'h3',
+    'h4',
+    'h5',
+    'h6',
+}
+MARKDOWN_INLINE = {'strong': '**', 'b': '**', 'em': '*', 'i': '*', 'code': '`'}
+TEXT_FORMATS = ('plain', 'paragraphs', 'markdown')
+CHUNK_SIZE = 1 << 16
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Splits the HTML of a text element into paragraphs of plain text (or
+    Markdown) in a single pass. Entities are decoded, whitespace is collapsed.
+    """
+
+    def __init__(self, markdown: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.paragraphs = []
+        self._parts = []
+        self._prefix = ''
+        self._lists = []
+        self._href = None
+
+    def _close_paragraph(self) -> None:
+        text = ' '.join(''.join(self._parts).split())
+        if text:
+            self.paragraphs.append(self._prefix + text)
+        self._parts = []
+        self._prefix = ''
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._close_paragraph()
+            if tag in ('ul', 'ol'):
+                self._lists.append(tag)
+        if tag == 'br':
+            self._parts.append('\n' if self.markdown else ' ')
+        if not self.markdown:
+            return
+        if tag[0] == 'h' and tag[1:].isdigit():
+            self._prefix = '#' * int(tag[1:]) + ' '
+        elif tag == 'li':
+            ordered = self._lists and self._lists[-1] == 'ol'
+            self._prefix = '1. ' if ordered else '- '
+        elif tag in MARKDOWN_INLINE:
+            self._parts.append(MARKDOWN_INLINE[tag])
+        elif tag == 'a':
+            self._href = dict(attrs).get('href')
+            self._parts.append('[')
+
+    def handle_endtag(self, tag):
+        if self.markdown and tag in MARKDOWN_INLINE:
+            self._parts.append(MARKDOWN_INLINE[tag])
+        elif self.markdown and tag == 'a':
+            self._parts.append('](' + (self._href or '') + ')')
+            self._href = None
+        if tag in BLOCK_TAGS:
+            self._close_paragraph()
+            if tag in ('ul', 'ol') and self._lists:
+                self._lists.pop()
+
+    def handle_data(self, data):
+        self._parts.append(data)
+
+    def close(self):
+        super().close()
+        self._close_paragraph()
+
+
+class TextView:
+    """
+    The content of a Labfolder text element. The first paragraph is the title,
+    the remaining ones form the body. The HTML is parsed incrementally: only
+    as far as needed for the title, and completely once the body is read.
+    """
+
+    def __init__(self, content: str):
+        self.content = content or ''
+        self._parser = HTMLTextExtractor()
+        self._position = 0
+
+    def _feed(self, paragraphs: Optional[int] = None) -> list:
+        parser = self._parser
+        while self._position < len(self.content) and (
+            paragraphs is None or len(parser.paragraphs) < paragraphs
+        ):
+            chunk = self.content[self._position : self._position + CHUNK_SIZE]
+            self._position += CHUNK_SIZE
+            parser.feed(chunk)
+        if self._position >= len(self.content) and paragraphs is None:
+            parser.close()
+        return parser.paragraphs
+
+    @cached_property
+    def title(self) -> str:
+        # The second paragraph has to start before the first one is complete.
+        paragraphs = self._feed(2)
+        if self._position >= len(self.content):
+            paragraphs = self.paragraphs
+        return paragraphs[0] if paragraphs else ''
+
+    @cached_property
+    def paragraphs(self) -> list:
+        return self._feed()
+
+    @cached_property
+    def markdown_paragraphs(self) -> list:
+        parser = HTMLTextExtractor(markdown=True)
+        parser.feed(self.content)
+        parser.close()
+        return parser.paragraphs
+
+    def body(self, text_format: str = 'plain') -> str:
+        """
+        The text after the title: paragraphs joined by ';' for 'plain', by
+        blank lines for 'paragraphs' and rendered as Markdown for 'markdown'.
+        """
+        if text_format == 'markdown':
+            return '\n\n'.join(self.markdown_paragraphs[1:])
+        separator = '\n\n' if text_format == 'paragraphs' else ';'
+        return separator.join(self.paragraphs[1:])
+
+
+class ElementCollector:
+    """
+    Collects the content of the elements of one entry in a single pass. Keys
+    that are set by more than one element are recorded in `collisions`; the
+    last element wins.
+
+    If given, only the data elements in `data_paths`, the text elements in
+    `text_titles` and the tables and columns in `table_columns` are kept,
+    everything else is counted by kind in `skipped` without being parsed
+    further.
+    """
+
+    def __init__(
+        self,
+        table_columns: Optional[dict] = None,
+        data_paths: Optional[set] = None,
+        text_titles: Optional[set] = None,
+    ):
+        self.table_columns = table_columns
+        self.data_paths = data_paths
+        self.text_titles = text_titles
+        self.data = dict()
+        self.texts = dict()
+        self.tables = dict()
+        self.collisions = []
+        self.skipped = dict()
+
+    def _skip(self, kind: str, count: int = 1) -> None:
+        self.skipped[kind] = self.skipped.get(kind, 0) + count
+
+    def add(self, element) -> None:
+        if element.element_type == 'DATA':
+            self.add_data(element.labfolder_data or dict())
+        elif element.element_type == 'TEXT':
+            self.add_text(TextView(element.content))
+        elif element.element_type == 'TABLE':
+            self.add_table(element.title, element.content)
+
+    def add_data(self, labfolder_data: dict) -> None:
+        for key, value in labfolder_data.items():
+            if self.data_paths is not None and (key,) not in self.data_paths:
+                self._skip('DATA')
+                continue
+            if key in self.data:
+                self.collisions.append(('DATA', key))
+            self.data[key] = value
+
+    def add_text(self, text: TextView) -> None:
+        if self.text_titles is not None and text.title not in self.text_titles:
+            self._skip('TEXT')
+            return
+        if text.title in self.texts:
+            self.collisions.append(('TEXT', text.title))
+        self.texts[text.title] = text
+
+    def add_table(self, title: str, content: dict) -> None:
+        columns = None
+        if self.table_columns is not None:
+            if title not in self.table_columns:
+                self._skip('TABLE')
+                return
+            columns = self.table_columns[title]
+        tables = self.tables.setdefault(title, [])
+        for sheet_name, sheet in content['sheets'].items():
+            table = LabfolderTable(title, sheet['data']['dataTable'], columns)
+            name = title + '/' + sheet_name
+            if columns is not None and not table.columns:
+                self._skip('SHEET')
+                continue
+            if table.skipped_columns:
+                self._skip('COLUMN', table.skipped_columns)
+            tables.append(table)
+
+
+def index_data_content(data_content: dict, paths: Optional[set] = None) -> dict:
+    """
+    Flattens the (arbitrarily nested) content of the Labfolder data elements
+    into a dictionary keyed by the path tuple of every group and data field.
+    If `paths` is given, only these paths and their groups are indexed.
+    """
+    index = dict()
+    stack = [((), data_content)]
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            if not isinstance(value, dict):
+                continue
+            path = prefix + (key,)
+            if paths is not None and path not in paths:
+                continue
+            index[path] = value
+            stack.append((path, value))
+    return index
+
+
+def resolve_data_rules(plan, data_index: dict) -> dict:
+    """
+    Looks up the values of all data element rules of the mapping plan once and
+    groups them by their target section.
+    """
+    return {
+        name: [(rule, data_index.get(rule.path)) for rule in section.data_rules]
+        for name, section in plan.sections.items()
+    }
@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+from http import HTTPStatus
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+CONDITIONAL_HEADERS = (
+    ('etag', 'If-None-Match'),
+    ('last-modified', 'If-Modified-Since'),
+)
+
+
+class FetchCacheMiss(Exception):
+    pass
+
+
+class CachedResponse:
+    """
+    A stored response of the Labfolder API with the parts of a
+    `requests.Response` that the import uses.
+    """
+
+    status_code = 200
+
+    def __init__(self, url: str, content: bytes, headers: dict):
+        self.url = url
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def is_immutable(url: str) -> bool:
+    """
+    Urls of element versions always return the same content.
+    """
+    return '/version/' in url
+
+
+def is_cacheable(url: str) -> bool:
+    """
+    Only the JSON responses of the entry list and of element versions are
+    cached. File and image downloads are not versioned and can be large.
+    """
+    return urlparse(url).path.endswith('/entries') or is_immutable(url)
+
+
+def account_key(email: str, password: str) -> str:
+    """
+    A key derived from the credentials of a Labfolder account. The cached
+    responses are stored under it, so that they are only replayed to users
+    who could log in to the account. The derivation is deliberately slow, so
+    callers should compute the key once per import.
+    """
+    return hashlib.pbkdf2_hmac(
+        'sha256', password.encode(), email.encode(), 100_000
+    ).hex()
+
+
+class ResponseCache:
+    """
+    Stores the responses of the entry list and of element versions of the
+    Labfolder API as JSON files in `directory`, keyed by the account and the
+    API url, which contains the project ids and the element versions. Element
+    versions are served from the cache without a request, the entry list is
+    refetched conditionally on the ETag or Last-Modified header of the stored
+    response. Other urls are always fetched. In `offline` mode, only stored
+    responses are replayed.
+    """
+
+    def __init__(self, directory: str, offline: bool = False, account: str = ''):
+        self.directory = directory
+        self.offline = offline
+        self.account = account
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256((self.account + '\n' + url).encode()).hexdigest()
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, url: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(url)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(
+            url, base64.b64decode(stored['content']), stored['headers']
+        )
+
+    def store(self, url: str, response) -> CachedResponse:
+        headers = {
+            name: response.headers[name]
+            for name, _ in CONDITIONAL_HEADERS
+            if name in response.headers
+        }
+        stored = dict(
+            url=url,
+            headers=headers,
+            content=base64.b64encode(response.content).decode(),
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first, as several uploads may share the cache.
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stored, f)
+        os.replace(path, self._path(url))
+        return CachedResponse(url, response.content, headers)
+
+    def get(self, url: str, fetch: Callable):
+        """
+        Returns the response for `url`. `fetch` is called with the conditional
+        request headers and has to return a response with the status 200, or
+        304 if the stored response is still valid.
+        """
+        if not is_cacheable(url):
+            if self.offline:
+                raise FetchCacheMiss(
+                    'The Labfolder download ' + url + ' is not cached and cannot '
+                    'be fetched offline.'
+                )
+            return fetch(dict())
+        cached = self.load(url)
+        if self.offline:
+            if cached is None:
+                raise FetchCacheMiss(
+                    'The Labfolder response for ' + url + ' is not in the cache.'
+                )
+            return cached
+        if cached is not None and is_immutable(url):
+            return cached
+
+        conditions = dict()
+        if cached is not None:
+            conditions = {
+                header: cached.headers[name]
+                for name, header in CONDITIONAL_HEADERS
+                if name in cached.headers
+            }
+        response = fetch(conditions)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and cached is not None:
+            return cached
+        return self.store(url, response)
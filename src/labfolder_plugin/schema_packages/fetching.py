@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def pooled_session(max_workers: int, retries: int, backoff: float):
+    """
+    A session keeping up to `max_workers` connections open, which retries
+    failed GET requests with an exponential backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max_workers,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=('GET',),
+            raise_on_status=False,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _entries_url(project_ids: list, page_size: int) -> str:
+    url = '/entries?project_ids=' + ','.join(project_ids) + '&limit='
+    return url + str(page_size) + '&offset='
+
+
+def fetch_project(
+    api_method: Callable,
+    project_ids: list,
+    load_element: Callable,
+    max_workers: int = 4,
+    page_size: int = 50,
+) -> list:
+    """
+    Fetches the entries of the Labfolder projects page by page and loads their
+    elements concurrently, with at most `max_workers` requests at a time.
+    The next page is requested as soon as the previous one arrived.
+
+    `api_method(url)` returns the response for an API url and
+    `load_element(element)` is called with every element of an entry.
+    Returns the entries without their elements, in the order of the API,
+    together with the results of `load_element` for their elements.
+    """
+    url = _entries_url(project_ids, page_size)
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        pending = []
+        seen = set()
+        next_page = executor.submit(lambda: api_method(url + '0').json())
+        offset = 0
+        while next_page is not None:
+            page = next_page.result()
+            # Servers ignoring the offset would return the same page forever.
+            page = [entry for entry in page if str(entry.get('id')) not in seen]
+            seen.update(str(entry.get('id')) for entry in page)
+            offset += page_size
+            next_page = None
+            if len(page) >= page_size:
+                next_page = executor.submit(
+                    lambda offset=offset: api_method(url + str(offset)).json()
+                )
+            for entry in page:
+                elements = entry.pop('elements', None) or []
+                pending.append(
+                    (entry, [executor.submit(load_element, e) for e in elements])
+                )
+        return [
+            (entry, [future.result() for future in futures])
+            for entry, futures in pending
+        ]
+
+
+def iter_project(  # noqa: PLR0913, PLR0917
+    api_method: Callable,
+    project_ids: list,
+    load_element: Callable,
+    max_workers: int = 1,
+    page_size: int = 50,
+    select: Optional[Callable] = None,
+):
+    """
+    Yields the entries of the Labfolder projects one at a time, in the order of
+    the API, together with the results of `load_element` for their elements.
+    Only the current page of entries and the elements of one entry are held
+    at a time. The elements of an entry are loaded with at most `max_workers`
+    concurrent requests, the next entry is only fetched once the consumer
+    asks for it. The elements of entries rejected by `select` are not loaded,
+    they are yielded with `None` instead.
+    """
+    url = _entries_url(project_ids, page_size)
+    seen = set()
+    offset = 0
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        while True:
+            page = api_method(url + str(offset)).json()
+            page = [entry for entry in page if str(entry.get('id')) not in seen]
+            seen.update(str(entry.get('id')) for entry in page)
+            full_page = len(page) >= page_size
+            page.reverse()
+            while page:
+                entry = page.pop()
+                elements = entry.pop('elements', None) or []
+                if select is not None and not select(entry):
+                    yield entry, None
+                    continue
+                yield entry, list(executor.map(load_element, elements))
+            if not full_page:
+                return
+            offset += page_size
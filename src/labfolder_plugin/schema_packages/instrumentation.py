@@ -0,0 +1,81 @@
+import cProfile
+import marshal
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+_NO_PHASE = nullcontext()
+
+
+class ImportMetrics:
+    """
+    Durations of the phases of a Labfolder import and counters of the
+    processed elements, rows, fields and archives. A disabled instance
+    records nothing, so the conversion can always be written against it.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.durations = defaultdict(float)
+        self.counters = Counter()
+
+    def phase(self, name: str):
+        """
+        Times the enclosed code as phase `name`. Disabled metrics return one
+        shared no-op context, as the conversion enters phases for every row.
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += value
+
+    def merge(self, other: 'ImportMetrics') -> None:
+        if not self.enabled:
+            return
+        for name, duration in other.durations.items():
+            self.durations[name] += duration
+        self.counters.update(other.counters)
+
+    def as_dict(self) -> dict:
+        return dict(
+            durations={
+                name: round(duration, 6) for name, duration in self.durations.items()
+            },
+            counters=dict(sorted(self.counters.items())),
+        )
+
+    def emit(self, logger) -> None:
+        if self.enabled:
+            logger.info('Labfolder import metrics.', data=self.as_dict())
+
+
+@contextmanager
+def profile_to_raw_file(archive, file_name: str, logger):
+    """
+    Profiles the enclosed code with cProfile and writes the stats to the raw
+    file `file_name` of the upload, to be read with `pstats.Stats`.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.create_stats()
+        try:
+            with archive.m_context.raw_file(file_name, 'wb') as f:
+                f.write(marshal.dumps(profile.stats))
+            logger.info('Profile written to ' + file_name + '.')
+        except Exception as error:
+            logger.warning('The profile could not be written: ' + str(error))
@@ -0,0 +1,15 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for the module `name`, which is only imported when one of its
+    attributes is first accessed. Keeps heavy dependencies of the import
+    process out of the startup of processes that only load the schema.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        return getattr(importlib.import_module(self._name), attribute)
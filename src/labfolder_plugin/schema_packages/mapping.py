@@ -0,0 +1,403 @@
+import hashlib
+import importlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+import yaml
+
+from labfolder_plugin.schema_packages.elements import TEXT_FORMATS
+from labfolder_plugin.schema_packages.setters import compile_setters
+from labfolder_plugin.schema_packages.templates import NameTemplate, TemplateError
+
+SECTION_TYPES = ('main', 'SubSection', 'Archive')
+REPEATS = ('false', 'true', 'per line')
+DEFAULT_COLUMNAR_ROWS = 100
+
+
+class MappingError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class MappingRule:
+    """
+    A single mapping rule: the value found at `path` in the Labfolder element
+    content is assigned to the quantity `key` of the mapped class `section`.
+    `columnar` table rules store whole columns and only apply to tables stored
+    as columns.
+    """
+
+    path: tuple
+    section: str
+    key: str
+    text_format: str = 'plain'
+    unit: Optional[str] = None
+    columnar: bool = False
+
+
+@dataclass
+class SectionPlan:
+    """
+    The compiled form of one entry of the 'Classes' block of a mapping file.
+    `main_classes` holds the main classes that have the attribute of a
+    SubSection or Archive class.
+    """
+
+    name: str
+    class_path: str
+    type: str
+    attribute: str
+    repeats: str
+    name_template: Optional[NameTemplate] = None
+    section_class: Optional[type] = None
+    data_rules: list = field(default_factory=list)
+    text_rules: list = field(default_factory=list)
+    table_rules: list = field(default_factory=list)
+    setters: dict = field(default_factory=dict)
+    columnar_tables: set = field(default_factory=set)
+    main_classes: set = field(default_factory=set)
+
+
+@dataclass
+class MappingPlan:
+    """
+    A validated mapping file with resolved classes and the mapping rules
+    grouped by their target section. `data_paths`, `text_titles` and
+    `table_columns` hold everything the rules and names refer to, all other
+    Labfolder elements are skipped. `table_storage` holds the minimal number
+    of rows from which a table is stored as columns.
+    """
+
+    digest: str
+    sections: dict
+    table_columns: dict = field(default_factory=dict)
+    table_storage: dict = field(default_factory=dict)
+    data_paths: set = field(default_factory=set)
+    text_titles: set = field(default_factory=set)
+    warnings: list = field(default_factory=list)
+
+    def take_warnings(self) -> list:
+        """
+        Returns the warnings of compiling the plan, only on the first call.
+        """
+        warnings, self.warnings = self.warnings, []
+        return warnings
+
+    @property
+    def classes(self) -> dict:
+        return {
+            name: section.section_class
+            for name, section in self.sections.items()
+            if section.section_class is not None
+        }
+
+
+def _collect_data_rules(maps: dict, prefix: tuple, rules: list) -> None:
+    for key, value in maps.items():
+        if not isinstance(value, dict):
+            raise MappingError(
+                'Data element ' + '.'.join(prefix + (key,)) + ' is not a mapping.'
+            )
+        if 'object' in value:
+            rules.append(_make_rule(value, prefix + (key,)))
+        else:
+            _collect_data_rules(value, prefix + (key,), rules)
+
+
+def _make_rule(value: dict, path: tuple) -> MappingRule:
+    if 'key' not in value:
+        raise MappingError('Mapping for ' + '.'.join(path) + ' has no key.')
+    return MappingRule(path=path, section=value['object'], key=value['key'])
+
+
+def _make_text_rule(value: dict, path: tuple) -> MappingRule:
+    rule = _make_rule(value, path)
+    text_format = value.get('format', 'plain')
+    if text_format not in TEXT_FORMATS:
+        raise MappingError(
+            'The text format of '
+            + '.'.join(path)
+            + ' has to be one of '
+            + str(list(TEXT_FORMATS))
+            + '.'
+        )
+    return replace(rule, text_format=text_format)
+
+
+def _make_table_rule(value: dict, path: tuple) -> MappingRule:
+    rule = _make_rule(value, path)
+    unit = value.get('unit')
+    if unit is not None and not isinstance(unit, str):
+        raise MappingError('The unit of ' + '.'.join(path) + ' has to be a string.')
+    return replace(rule, unit=unit)
+
+
+class ClassRegistry:
+    """
+    Resolves the class paths of mapping files to classes. Results are cached,
+    including failed look-ups together with the reason of the failure.
+    """
+
+    def __init__(self):
+        self._classes = dict()
+
+    def resolve(self, class_path: str) -> tuple:
+        """
+        Returns the class for `class_path` and `None`, or `None` and a message
+        why the class could not be resolved.
+        """
+        if class_path not in self._classes:
+            self._classes[class_path] = self._import(class_path)
+        return self._classes[class_path]
+
+    @staticmethod
+    def _import(class_path: str) -> tuple:
+        module_name, _, class_name = class_path.rpartition('.')
+        try:
+            return getattr(importlib.import_module(module_name), class_name), None
+        except AttributeError:
+            return None, (
+                'The module ' + module_name + ' has no class ' + class_name + '.'
+            )
+        except (ModuleNotFoundError, ValueError):
+            return None, 'The module ' + module_name + ' was not found.'
+
+    def clear(self) -> None:
+        self._classes.clear()
+
+
+class_registry = ClassRegistry()
+
+
+def _compile_section(name: str, cl: dict, warnings: list) -> SectionPlan:
+    missing = [
+        key
+        for key in ('class', 'type', 'attribute', 'repeats', 'name')
+        if key not in cl
+    ]
+    if missing:
+        raise MappingError(
+            'The class ' + name + ' is missing the fields ' + str(missing) + '.'
+        )
+    if cl['type'] not in SECTION_TYPES:
+        raise MappingError(
+            'The class ' + name + ' has the unknown type ' + str(cl['type']) + '.'
+        )
+    repeats = str(cl['repeats']).lower()
+    if repeats not in REPEATS:
+        raise MappingError(
+            'The class ' + name + ' has the unknown repeats ' + repeats + '.'
+        )
+    try:
+        name_template = NameTemplate(cl['name'], row_allowed=repeats == 'per line')
+    except TemplateError as error:
+        raise MappingError('The name of class ' + name + ': ' + str(error)) from error
+    if not name_template and cl['type'] in ('main', 'Archive'):
+        raise MappingError(
+            'The class ' + name + ' of type ' + cl['type'] + ' needs a name.'
+        )
+    section_class, warning = class_registry.resolve(cl['class'])
+    if warning:
+        warnings.append(warning)
+    return SectionPlan(
+        name=name,
+        class_path=cl['class'],
+        type=cl['type'],
+        attribute=cl['attribute'],
+        repeats=repeats,
+        name_template=name_template,
+        section_class=section_class,
+    )
+
+
+def resolve_attributes(plan: MappingPlan) -> None:
+    """
+    Resolves for every SubSection and Archive class the main classes that
+    have its attribute, and warns about classes whose attribute is missing in
+    all of them. With several main classes, a class may only belong to some
+    of them.
+    """
+    mains = {
+        name: section.section_class
+        for name, section in plan.sections.items()
+        if section.type == 'main' and section.section_class is not None
+    }
+    for section in plan.sections.values():
+        if section.type == 'main' or section.section_class is None:
+            continue
+        section.main_classes = {
+            name
+            for name, main_class in mains.items()
+            if (
+                section.attribute in main_class.m_def.all_properties
+                if hasattr(main_class, 'm_def')
+                else hasattr(main_class, section.attribute)
+            )
+        }
+        if mains and not section.main_classes:
+            plan.warnings.append(
+                'None of the classes '
+                + ', '.join(mains)
+                + ' has an attribute '
+                + section.attribute
+                + ' for '
+                + section.name
+                + '.'
+            )
+
+
+def _compile_table_storage(storage: dict, plan: MappingPlan) -> None:
+    """
+    Compiles the 'Table storage' block: the rules of classes repeating per
+    line are copied as columnar rules to the class storing the columns of
+    their table.
+    """
+    for title, value in storage.items():
+        if not isinstance(value, dict) or value.get('columns') not in plan.sections:
+            raise MappingError(
+                'The table storage of ' + title + ' needs the class of its columns.'
+            )
+        section = plan.sections[value['columns']]
+        if section.repeats != 'false':
+            raise MappingError(
+                'The class '
+                + section.name
+                + ' storing the columns of '
+                + title
+                + " needs repeats 'false'."
+            )
+        min_rows = value.get('min_rows', DEFAULT_COLUMNAR_ROWS)
+        if not isinstance(min_rows, int) or isinstance(min_rows, bool) or min_rows < 0:
+            raise MappingError(
+                'The min_rows of the table storage of '
+                + title
+                + ' has to be a non-negative integer.'
+            )
+        plan.table_storage[title] = min_rows
+        section.columnar_tables.add(title)
+        for other in plan.sections.values():
+            if other.repeats != 'per line':
+                continue
+            section.table_rules.extend(
+                replace(rule, section=section.name, columnar=True)
+                for rule in other.table_rules
+                if rule.path[0] == title
+            )
+
+
+def _collect_references(plan: MappingPlan) -> None:
+    """
+    Collects the data paths, text titles and table columns the rules and
+    names of the plan refer to.
+    """
+    data_paths = []
+    for section in plan.sections.values():
+        data_paths.extend(rule.path for rule in section.data_rules)
+        data_paths.extend(section.name_template.data_paths)
+        plan.text_titles.update(rule.path[0] for rule in section.text_rules)
+        for rule in section.table_rules:
+            plan.table_columns.setdefault(rule.path[0], set()).add(rule.path[1])
+    for path in data_paths:
+        plan.data_paths.update(path[:depth] for depth in range(1, len(path) + 1))
+
+    for section in plan.sections.values():
+        if not section.name_template.row_columns:
+            continue
+        if not section.table_rules:
+            raise MappingError(
+                'The name of class '
+                + section.name
+                + ' uses LF.row, but the class maps no table.'
+            )
+        for rule in section.table_rules:
+            plan.table_columns[rule.path[0]].update(section.name_template.row_columns)
+
+
+def compile_mapping(inp: dict, digest: str = '') -> MappingPlan:
+    """
+    Validates the parsed content of a mapping file and compiles it into a
+    `MappingPlan`.
+    """
+    if not isinstance(inp, dict) or 'Classes' not in inp or 'Mapping' not in inp:
+        raise MappingError('The mapping file needs a "Classes" and a "Mapping" block.')
+
+    plan = MappingPlan(digest=digest, sections=dict())
+    for name, cl in inp['Classes'].items():
+        plan.sections[name] = _compile_section(name, cl, plan.warnings)
+
+    blocks = inp['Mapping'] or dict()
+    data_rules = []
+    _collect_data_rules(blocks.get('Data elements') or dict(), (), data_rules)
+    text_rules = [
+        _make_text_rule(value, (title,))
+        for title, value in (blocks.get('Text elements') or dict()).items()
+    ]
+    table_rules = [
+        _make_table_rule(value, (title, column))
+        for title, columns in (blocks.get('Table elements') or dict()).items()
+        for column, value in columns.items()
+    ]
+
+    for rules, attribute in (
+        (data_rules, 'data_rules'),
+        (text_rules, 'text_rules'),
+        (table_rules, 'table_rules'),
+    ):
+        for rule in rules:
+            if rule.section not in plan.sections:
+                raise MappingError(
+                    'The mapping for '
+                    + '.'.join(rule.path)
+                    + ' targets the unknown class '
+                    + str(rule.section)
+                    + '.'
+                )
+            getattr(plan.sections[rule.section], attribute).append(rule)
+
+    _compile_table_storage(blocks.get('Table storage') or dict(), plan)
+    _collect_references(plan)
+    for section in plan.sections.values():
+        compile_setters(section, plan.warnings)
+    resolve_attributes(plan)
+    return plan
+
+
+def parse_mapping(content: bytes, mapping_file: str) -> dict:
+    if mapping_file.endswith('.json'):
+        return json.loads(content)
+    if mapping_file.endswith(('.yaml', '.yml')):
+        return yaml.safe_load(content)
+    raise MappingError(
+        'The mapping file has an unsuitable format. Please use a json or yaml file.'
+    )
+
+
+_plan_cache: 'OrderedDict[tuple, MappingPlan]' = OrderedDict()
+
+
+def load_mapping_plan(archive, mapping_file: str, cache_size: int = 32) -> MappingPlan:
+    """
+    Returns the compiled mapping plan for the given raw file of the upload.
+
+    Plans are cached per upload, file path and content hash, so that repeated
+    normalizations with an unchanged mapping file skip parsing, validation and
+    class resolution. The least recently used plans are evicted first.
+    """
+    with archive.m_context.raw_file(mapping_file, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    upload_id = archive.metadata.upload_id if archive.metadata else None
+    key = (upload_id, mapping_file, digest)
+
+    plan = _plan_cache.get(key)
+    if plan is not None:
+        _plan_cache.move_to_end(key)
+        return plan
+
+    plan = compile_mapping(parse_mapping(content, mapping_file), digest)
+    _plan_cache[key] = plan
+    while len(_plan_cache) > max(cache_size, 0):
+        _plan_cache.popitem(last=False)
+    return plan
@@ -1,6 +1,9 @@
+import gc
+import json
 from typing import (
     TYPE_CHECKING,
 )
+from urllib.parse import parse_qs, urlparse
 
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import (
@@ -10,11 +13,14 @@ if TYPE_CHECKING:
         BoundLogger,
     )
 
-import importlib
+    from labfolder_plugin.schema_packages.instrumentation import ImportMetrics
+    from labfolder_plugin.schema_packages.writer import ArchiveWriter
 
-import pandas as pd
+import requests
+import yaml
 from nomad.config import config
 from nomad.datamodel.data import (
+    ArchiveSection,
     ElnIntegrationCategory,
 )
 from nomad.datamodel.metainfo.annotations import (
@@ -23,16 +29,30 @@ from nomad.datamodel.metainfo.annotations import (
     ELNComponentEnum,
     SectionProperties,
 )
-from nomad.datamodel.metainfo.eln.labfolder import LabfolderProject
+from nomad.datamodel.metainfo.eln.labfolder import (
+    LabfolderEntry,
+    LabfolderImportError,
+    LabfolderProject,
+    _element_type_path_mapping,
+    _element_type_section_mapping,
+)
 from nomad.metainfo import (
+    MEnum,
     Quantity,
     SchemaPackage,
     Section,
+    SubSection,
 )
-from nomad.units import ureg
-from nomad_material_processing.utils import (
-    create_archive,
-)
+
+from labfolder_plugin.schema_packages.lazy import LazyModule
+
+# The import process is only loaded when a project is normalized.
+conversion = LazyModule('labfolder_plugin.schema_packages.conversion')
+fetch_cache = LazyModule('labfolder_plugin.schema_packages.fetch_cache')
+fetching = LazyModule('labfolder_plugin.schema_packages.fetching')
+instrumentation = LazyModule('labfolder_plugin.schema_packages.instrumentation')
+mapping = LazyModule('labfolder_plugin.schema_packages.mapping')
+writer = LazyModule('labfolder_plugin.schema_packages.writer')
 
 configuration = config.get_plugin_entry_point(
     'labfolder_plugin.schema_packages:schema_package_entry_point'
@@ -41,6 +61,43 @@ configuration = config.get_plugin_entry_point(
 m_package = SchemaPackage()
 
 
+def _response_cache(account=''):
+    if configuration is None or not configuration.fetch_cache_dir:
+        return None
+    return fetch_cache.ResponseCache(
+        configuration.fetch_cache_dir,
+        offline=configuration.fetch_offline,
+        account=account,
+    )
+
+
+class LabFolderImportResult(ArchiveSection):
+    m_def = Section(label_quantity='entry_id')
+
+    entry_id = Quantity(type=str, description='The id of the Labfolder entry.')
+    title = Quantity(type=str, description='The title of the Labfolder entry.')
+    status = Quantity(
+        type=MEnum('success', 'unchanged', 'skipped', 'failed'),
+        description='The outcome of the import of this entry.',
+    )
+    message = Quantity(type=str, description='Why the entry was skipped or failed.')
+    archive_name = Quantity(
+        type=str, description='The name of the archive created for this entry.'
+    )
+    archive_files = Quantity(
+        type=str,
+        shape=['*'],
+        description='The names of all archives created for this entry.',
+    )
+    fingerprint = Quantity(
+        type=str,
+        description="""
+        Hash of the entry content, the mapping file and the plugin version the
+        archive was created from. Unchanged entries are not imported again.
+        """,
+    )
+
+
 class LabFolderImport(LabfolderProject):
     m_def = Section(
         label='General Labfolder Project Import',
@@ -50,6 +107,11 @@ class LabFolderImport(LabfolderProject):
                 order=[
                     'project_url',
                     'import_entry_id',
+                    'import_entry_ids',
+                    'import_tags',
+                    'import_all',
+                    'streaming_import',
+                    'force_reimport',
                     'labfolder_email',
                     'password',
                     'mapping_file',
@@ -70,6 +132,58 @@ class LabFolderImport(LabfolderProject):
         ),
     )
 
+    import_entry_ids = Quantity(
+        type=str,
+        shape=['*'],
+        description='The ids of further Labfolder entries to import.',
+        a_eln=ELNAnnotation(component='StringEditQuantity'),
+    )
+
+    import_tags = Quantity(
+        type=str,
+        shape=['*'],
+        description='Imports all entries of the project with one of these tags.',
+        a_eln=ELNAnnotation(component='StringEditQuantity'),
+    )
+
+    import_all = Quantity(
+        type=bool,
+        default=False,
+        description='Imports all entries of the project.',
+        a_eln=ELNAnnotation(component='BoolEditQuantity'),
+    )
+
+    streaming_import = Quantity(
+        type=bool,
+        default=False,
+        description="""
+        Fetches, converts and writes the project one entry at a time to bound
+        the memory of very large projects. The entries are then stored without
+        their elements, set resync_labfolder_repository to import again.
+        """,
+        a_eln=ELNAnnotation(component='BoolEditQuantity'),
+    )
+
+    entries_streamed = Quantity(
+        type=bool,
+        default=False,
+        description="""
+        The entries were fetched by a streaming import and are stored without
+        their elements. They are fetched again before a regular import.
+        """,
+    )
+
+    force_reimport = Quantity(
+        type=bool,
+        default=False,
+        description="""
+        Imports all selected entries, also the unchanged ones, and replaces
+        existing archives of the same names, e.g. those of an older version
+        of the plugin.
+        """,
+        a_eln=ELNAnnotation(component='BoolEditQuantity'),
+    )
+
     mapping_file = Quantity(
         type=str,
         description="""
@@ -79,371 +193,628 @@ class LabFolderImport(LabfolderProject):
         a_eln=ELNAnnotation(component='FileEditQuantity'),
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:  # noqa: PLR0912, PLR0915
-        super().normalize(archive, logger)
-
-        import re
-
-        TAG_RE = re.compile(r'<[^>]+>')
-
-        _selection_mapping = dict()
+    owned_archive_files = Quantity(
+        type=str,
+        shape=['*'],
+        description="""
+        The names of all archives written by this import, also of entries that
+        are no longer selected. They may be replaced by later runs.
+        """,
+    )
 
-        if self.mapping_file:
-            if self.mapping_file.endswith('.json'):
-                import json
+    import_results = SubSection(section_def=LabFolderImportResult, repeats=True)
 
-                with archive.m_context.raw_file(self.mapping_file, 'r') as mapping:
-                    inp = json.load(mapping)
-            elif self.mapping_file.endswith('.yaml'):
-                import yaml
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        metrics = instrumentation.ImportMetrics(
+            bool(configuration and configuration.instrumentation)
+        )
+        self._account = None
+        if self.streaming_import:
+            self._normalize_streaming(archive, logger, metrics)
+            return
 
-                with archive.m_context.raw_file(self.mapping_file, 'r') as mapping:
-                    inp = yaml.safe_load(mapping)
-            else:
+        if self.entries_streamed and not self.resync_labfolder_repository:
+            if not self.labfolder_email or not self.password:
+                super(LabfolderProject, self).normalize(archive, logger)
                 logger.error(
-                    'The mapping file has an unsuitable format. Please use a \
-                             json or yaml file.'
+                    'The entries were fetched by a streaming import without their '
+                    'elements. Enter the credentials to fetch them again.'
                 )
-            for cl in inp['Classes'].keys():
-                try:
-                    _selection_mapping[cl] = getattr(
-                        importlib.import_module(
-                            '.'.join(inp['Classes'][cl]['class'].split('.')[:-1])
-                        ),
-                        inp['Classes'][cl]['class'].split('.')[-1],
-                    )
-                except AttributeError:
-                    logger.warning(
-                        'The module '
-                        + '.'.join(inp['Classes'][cl]['class'].split('.')[:-1])
-                        + ' has no class '
-                        + inp['Classes'][cl]['class'].split('.')[-1]
-                        + '.'
-                    )
-                    continue
-                except ModuleNotFoundError:
-                    logger.warning(
-                        'The module '
-                        + '.'.join(inp['Classes'][cl]['class'].split('.')[:-1])
-                        + ' was not found.'
+                return
+            self.resync_labfolder_repository = True
+        if self.resync_labfolder_repository or not self.entries:
+            # Cleared before the fetch writes the mainfile with the full entries.
+            self.entries_streamed = False
+        with metrics.phase('fetch'):
+            self._normalize_project(archive, logger)
+
+        if not self.mapping_file:
+            return
+        plan = self._load_plan(archive, logger, metrics)
+        if plan is None:
+            return
+
+        entries, missing_ids = self._select_entries()
+        if not entries and not missing_ids:
+            return
+
+        previous_results = self._previous_results()
+        archive_writer = writer.ArchiveWriter(
+            archive, self._owned_files(), replace_existing=self.force_reimport
+        )
+        self.import_results = []
+        self._report_missing(missing_ids, logger)
+        with metrics.phase('fingerprint'):
+            results, changed_entries = self._check_fingerprints(
+                entries, plan, archive, previous_results
+            )
+        self._reserve_unchanged(results, archive_writer, logger)
+
+        profile_entry_id = configuration.profile_entry_id if configuration else None
+        for entry_conversion in conversion.convert_entries(
+            [entry for entry in changed_entries if str(entry.id) != profile_entry_id],
+            plan,
+            logger,
+            instrument=metrics.enabled,
+        ):
+            self._finish_conversion(
+                entry_conversion, results, archive_writer, logger, metrics
+            )
+        self._flush_archives(archive_writer, results, logger, metrics)
+        for entry in changed_entries:
+            if str(entry.id) != profile_entry_id:
+                continue
+            with instrumentation.profile_to_raw_file(
+                archive, 'labfolder_profile_' + profile_entry_id + '.prof', logger
+            ):
+                (entry_conversion,) = conversion.convert_entries(
+                    [entry], plan, logger, instrument=metrics.enabled
+                )
+                self._finish_conversion(
+                    entry_conversion, results, archive_writer, logger, metrics
+                )
+                self._flush_archives(archive_writer, results, logger, metrics)
+        for result in results.values():
+            self.import_results.append(result)
+        self._record_owned_files(archive_writer)
+        self._save_mainfile(archive)
+        self._log_import(archive_writer, logger, metrics)
+
+    def _normalize_streaming(
+        self,
+        archive: 'EntryArchive',
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ) -> None:
+        """
+        Fetches, converts and writes the project one entry at a time, so that
+        only the elements and sections of a single entry are held in memory.
+        The entries are kept without their elements, so the project is only
+        imported again on a resync.
+        """
+        super(LabfolderProject, self).normalize(archive, logger)
+        if self.entries and not self.resync_labfolder_repository:
+            logger.warning(
+                'The project was already fetched, the streaming import only runs '
+                'with resync_labfolder_repository.'
+            )
+            return
+        if not self.mapping_file:
+            logger.error('The streaming import needs a mapping file.')
+            return
+        plan = self._load_plan(archive, logger, metrics)
+        if plan is None:
+            return
+
+        previous_results = self._previous_results()
+        archive_writer = writer.ArchiveWriter(
+            archive, self._owned_files(), replace_existing=self.force_reimport
+        )
+        self.import_results = []
+        requested_ids = self._requested_ids()
+        found_ids = set()
+        max_workers = configuration.fetch_workers if configuration else 1
+        project_ids = self._start_fetch(logger, max_workers)
+        self.entries.clear()
+        try:
+            for entry, elements in fetching.iter_project(
+                lambda url: self._labfolder_api_method(requests.get, url),
+                project_ids,
+                lambda element: self._load_element(element, archive, logger),
+                max_workers=max_workers,
+                page_size=configuration.fetch_page_size if configuration else 50,
+                select=lambda entry: self._is_selected(
+                    entry.get('id'), entry.get('tags'), requested_ids
+                ),
+            ):
+                nomad_entry = self._make_entry(entry, elements or [], logger)
+                found_ids.add(str(nomad_entry.id))
+                if elements is not None:
+                    self._stream_entry(
+                        nomad_entry,
+                        plan,
+                        previous_results,
+                        archive_writer,
+                        logger,
+                        metrics,
                     )
-                    continue
-
+                nomad_entry.elements.clear()
+                self.entries.append(nomad_entry)
+        finally:
+            self._close_session()
+        self.resync_labfolder_repository = False
+        self.entries_streamed = True
+        self._logout()
+
+        if not self.import_all:
+            self._report_missing(sorted(requested_ids - found_ids), logger)
+        self._record_owned_files(archive_writer)
+        self._save_mainfile(archive)
+        self._log_import(archive_writer, logger, metrics)
+
+    def _stream_entry(  # noqa: PLR0913, PLR0917
+        self,
+        entry,
+        plan,
+        previous_results: dict,
+        archive_writer: 'ArchiveWriter',
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ) -> None:
+        """
+        Converts and writes a single entry of the streaming import.
+        """
+        archive = archive_writer.archive
+        with metrics.phase('fingerprint'):
+            results, changed_entries = self._check_fingerprints(
+                [entry], plan, archive, previous_results
+            )
+        self._reserve_unchanged(results, archive_writer, logger)
+        for entry_conversion in conversion.convert_entries(
+            changed_entries, plan, self.logger, instrument=metrics.enabled
+        ):
+            self._finish_conversion(
+                entry_conversion, results, archive_writer, logger, metrics
+            )
+        self._flush_archives(archive_writer, results, logger, metrics)
+        for result in results.values():
+            self.import_results.append(result)
+        # The converted sections reference their parents, so they are only
+        # freed by the cyclic garbage collector. Its full collections are rare,
+        # without collecting here the sections of many entries pile up.
+        gc.collect()
+
+    def _load_plan(
+        self,
+        archive: 'EntryArchive',
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ):
+        """
+        Returns the compiled mapping plan, or `None` if the mapping file could
+        not be read.
+        """
+        try:
+            with metrics.phase('mapping_load'):
+                plan = mapping.load_mapping_plan(
+                    archive,
+                    self.mapping_file,
+                    cache_size=configuration.mapping_cache_size
+                    if configuration
+                    else 32,
+                )
+        except mapping.MappingError as error:
+            logger.error(str(error))
+            return None
+        except Exception as error:
+            logger.error('The mapping file could not be read: ' + str(error))
+            return None
+        for warning in plan.take_warnings():
+            logger.warning(warning)
+        return plan
+
+    def _previous_results(self) -> dict:
+        return {
+            result.entry_id: result
+            for result in self.import_results
+            if result.status in ('success', 'unchanged') and result.fingerprint
+        }
+
+    def _owned_files(self) -> set:
+        """
+        The archives written by the previous runs of the import, which may be
+        replaced.
+        """
+        return set(self.owned_archive_files or []) | {
+            file_name
+            for result in self.import_results
+            for file_name in (result.archive_files or [result.archive_name])
+            if file_name
+        }
+
+    def _reserve_unchanged(
+        self, results: dict, archive_writer: 'ArchiveWriter', logger: 'BoundLogger'
+    ) -> None:
+        """
+        Claims the archives of the unchanged entries, so that no other entry
+        replaces them.
+        """
+        for result in results.values():
+            if result.status != 'unchanged':
+                continue
+            try:
+                archive_writer.reserve(
+                    list(result.archive_files or [result.archive_name]),
+                    result.entry_id,
+                )
+            except writer.ArchiveNameCollision as error:
+                logger.error(str(error))
+                result.status = 'failed'
+                result.message = str(error)
+                result.fingerprint = None
+
+    def _report_missing(self, missing_ids: list, logger: 'BoundLogger') -> None:
+        for entry_id in missing_ids:
+            logger.warning(
+                'The entry ' + entry_id + ' was not found in the Labfolder project.'
+            )
+            self.import_results.append(
+                LabFolderImportResult(
+                    entry_id=entry_id,
+                    status='failed',
+                    message='Entry not found in the Labfolder project.',
+                )
+            )
+
+    def _record_owned_files(self, archive_writer: 'ArchiveWriter') -> None:
+        """
+        Adds the archives of this run to those of the previous runs, so that
+        entries selected again later can replace their own archives.
+        """
+        self.owned_archive_files = sorted(
+            self._owned_files() | set(archive_writer.written)
+        )
+
+    def _save_mainfile(self, archive: 'EntryArchive') -> None:
+        """
+        Writes the import with its results back to the mainfile, like
+        `_clear_user_data`, so that the fingerprints and the archives of the
+        import are known when the upload is processed again.
+        """
+        mainfile = archive.metadata.mainfile if archive.metadata else None
+        if not mainfile:
+            return
+        with archive.m_context.raw_file(mainfile, 'wt') as f:
+            if mainfile.endswith('json'):
+                json.dump(dict(data=archive.data.m_to_dict()), f)
+            else:
+                yaml.dump(dict(data=archive.data.m_to_dict()), f)
+
+    def _log_import(
+        self,
+        archive_writer: 'ArchiveWriter',
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ) -> None:
+        metrics.count('archives_created', len(archive_writer.written))
+        metrics.count('archives_unchanged', len(archive_writer.unchanged))
+        counts = {status: 0 for status in ('success', 'unchanged', 'skipped', 'failed')}
+        for result in self.import_results:
+            counts[result.status] += 1
+        logger.info('Labfolder import finished.', data=counts)
+        metrics.emit(logger)
+
+    def _labfolder_api_method(
+        self, method, url, msg='cannot do labfolder api request', **kwargs
+    ):
+        """
+        Routes the GET requests of the project fetch through the response cache
+        of the account if one is configured. In offline mode, nothing is sent
+        to the server.
+        """
+        cache = _response_cache(self._cache_account())
+        if method is not requests.get:
+            if cache is not None and cache.offline:
+                return dict()
+            return super()._labfolder_api_method(method, url, msg, **kwargs)
+
+        def fetch(conditions):
+            response = (getattr(self, '_session', None) or requests).get(
+                self._api_base_url + url,
+                headers={**self._headers, **conditions},
+                timeout=10,
+                **kwargs,
+            )
+            if response.status_code >= requests.codes.bad_request:
+                self.logger.error(
+                    msg,
+                    data=dict(status_code=response.status_code, text=response.text),
+                )
+                raise LabfolderImportError()
+            return response
+
+        if cache is None:
+            return fetch(dict())
+        try:
+            return cache.get(self._api_base_url + url, fetch)
+        except fetch_cache.FetchCacheMiss as error:
+            self.logger.error(str(error))
+            raise LabfolderImportError() from error
+
+    def _normalize_project(
+        self, archive: 'EntryArchive', logger: 'BoundLogger'
+    ) -> None:
+        """
+        Runs the normalization of `LabfolderProject`, which fetches the project
+        if needed, concurrently if `fetch_workers` is configured.
+        """
+        if (
+            configuration
+            and configuration.fetch_workers > 1
+            and (self.resync_labfolder_repository or not self.entries)
+        ):
+            self._fetch_project(archive, logger)
+            super(LabfolderProject, self).normalize(archive, logger)
+        else:
+            super().normalize(archive, logger)
+
+    def _fetch_project(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        """
+        The project fetch of `LabfolderProject.normalize`, with the entry pages
+        and elements requested concurrently over a pooled session.
+        """
+        project_ids = self._start_fetch(logger, configuration.fetch_workers)
+        try:
+            project = fetching.fetch_project(
+                lambda url: self._labfolder_api_method(requests.get, url),
+                project_ids,
+                lambda element: self._load_element(element, archive, logger),
+                max_workers=configuration.fetch_workers,
+                page_size=configuration.fetch_page_size,
+            )
+        finally:
+            self._close_session()
+
+        self.entries.clear()
+        for entry, elements in project:
+            self.entries.append(self._make_entry(entry, elements, logger))
+        self.resync_labfolder_repository = False
+        self._logout()
+
+    def _start_fetch(self, logger: 'BoundLogger', max_workers: int) -> list:
+        """
+        Checks the project settings, logs in and opens a pooled session for
+        `max_workers` concurrent requests. Returns the ids of the projects.
+        """
+        self.logger = logger
+        if not self.project_url or not self.labfolder_email or not self.password:
+            logger.error('missing information, cannot import project')
+            raise LabfolderImportError()
+        try:
+            project_ids = parse_qs(urlparse(self.project_url).fragment[1:])[
+                'projectIds'
+            ]
+        except KeyError as error:
+            logger.error('cannot parse project ids from url', exc_info=error)
+            raise LabfolderImportError() from error
+
+        cache = _response_cache(self._cache_account())
+        if cache is None or not cache.offline:
+            # Logs in once, before the requests are sent concurrently.
+            self._headers  # noqa: B018
+        self._session = None
+        if configuration:
+            self._session = fetching.pooled_session(
+                max(max_workers, 1),
+                configuration.fetch_retries,
+                configuration.fetch_backoff,
+            )
+        return project_ids
+
+    def _cache_account(self) -> str:
+        """
+        Returns the key of the account in the response cache. It is derived
+        once per import and kept instead of the credentials, which are cleared
+        after the fetch.
+        """
+        if getattr(self, '_account', None) is None:
+            self._account = ''
+            if self.labfolder_email and self.password:
+                self._account = fetch_cache.account_key(
+                    self.labfolder_email, self.password
+                )
+        return self._account
+
+    def _close_session(self) -> None:
+        if getattr(self, '_session', None) is not None:
+            self._session.close()
+        self._session = None
+
+    def _logout(self) -> None:
+        self._clear_user_data()
+        self._labfolder_api_method(requests.post, '/auth/logout')
+
+    def _load_element(
+        self, element: dict, archive: 'EntryArchive', logger: 'BoundLogger'
+    ):
+        """
+        Fetches an element of an entry and returns it as a section, or `None`
+        for unknown element types.
+        """
+        element_type = element['type']
+        if element_type not in _element_type_path_mapping:
+            logger.warning('unknown element type', data=dict(element_type=element_type))
+            return None
+        data = self._labfolder_api_method(
+            requests.get,
+            '/elements/'
+            + _element_type_path_mapping[element_type]
+            + '/'
+            + str(element['id'])
+            + '/version/'
+            + str(element['version_id']),
+        ).json()
+        nomad_element = _element_type_section_mapping[element_type]()
+        nomad_element.m_update_from_dict(data)
+        nomad_element.post_process(
+            self._labfolder_api_method, archive, logger, res_data=data
+        )
+        return nomad_element
+
+    def _make_entry(
+        self, entry: dict, elements: list, logger: 'BoundLogger'
+    ) -> LabfolderEntry:
+        nomad_entry = LabfolderEntry()
+        try:
+            nomad_entry.m_update_from_dict(entry)
+        except Exception as error:
+            logger.error('cannot update archive with labfolder data', exc_info=error)
+            raise LabfolderImportError() from error
+        for nomad_element in elements:
+            if nomad_element is not None:
+                nomad_entry.elements.append(nomad_element)
+        return nomad_entry
+
+    def _finish_conversion(  # noqa: PLR0913, PLR0917
+        self,
+        entry_conversion,
+        results: dict,
+        archive_writer: 'ArchiveWriter',
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ) -> None:
+        self._write_conversion(
+            entry_conversion,
+            results[entry_conversion.entry_id],
+            archive_writer,
+            logger,
+        )
+        metrics.merge(entry_conversion.metrics)
+
+    def _flush_archives(
+        self,
+        archive_writer: 'ArchiveWriter',
+        results: dict,
+        logger: 'BoundLogger',
+        metrics: 'ImportMetrics',
+    ) -> None:
+        with metrics.phase('create_archive'):
+            errors = archive_writer.flush()
+        for entry_id, message in errors.items():
+            logger.error(
+                'The archives of entry '
+                + entry_id
+                + ' could not be written: '
+                + message
+            )
+            result = results[entry_id]
+            result.status = 'failed'
+            result.message = message
+            result.fingerprint = None
+
+    def _write_conversion(
+        self,
+        entry_conversion,
+        result: LabFolderImportResult,
+        archive_writer: 'ArchiveWriter',
+        logger: 'BoundLogger',
+    ) -> None:
+        result.entry_id = entry_conversion.entry_id
+        result.title = entry_conversion.title
+        result.status = entry_conversion.status
+        result.message = entry_conversion.message
+        if entry_conversion.status == 'success':
+            try:
+                result.archive_files = conversion.write_conversion(
+                    entry_conversion, archive_writer
+                )
+                result.archive_name = entry_conversion.name
+            except writer.ArchiveNameCollision as error:
+                logger.error(str(error))
+                result.status = 'failed'
+                result.message = str(error)
+            except Exception as error:
+                logger.error(
+                    'The archives of entry '
+                    + entry_conversion.entry_id
+                    + ' could not be written.',
+                    exc_info=error,
+                )
+                result.status = 'failed'
+                result.message = str(error)
+        if result.status != 'success':
+            result.fingerprint = None
+
+    def _check_fingerprints(
+        self, entries: list, plan, archive: 'EntryArchive', previous_results: dict
+    ) -> tuple:
+        """
+        Fingerprints the entries and compares them with the previous import.
+        Returns the results of all entries, with the unchanged ones already
+        completed, and the entries that need to be converted.
+        """
+        results = dict()
+        changed_entries = []
+        for entry in entries:
+            entry_id = str(entry.id)
+            fingerprint = conversion.fingerprint_entry(entry, plan)
+            previous = previous_results.get(entry_id)
+            if (
+                not self.force_reimport
+                and previous is not None
+                and previous.fingerprint == fingerprint
+                and all(
+                    archive.m_context.raw_path_exists(file_name)
+                    for file_name in previous.archive_files or [previous.archive_name]
+                )
+            ):
+                results[entry_id] = LabFolderImportResult(
+                    entry_id=entry_id,
+                    title=entry.title,
+                    status='unchanged',
+                    archive_name=previous.archive_name,
+                    archive_files=previous.archive_files,
+                    fingerprint=fingerprint,
+                )
+            else:
+                results[entry_id] = LabFolderImportResult(fingerprint=fingerprint)
+                changed_entries.append(entry)
+        return results, changed_entries
+
+    def _requested_ids(self) -> set:
+        """
+        The ids of the entries requested by `import_entry_id` and
+        `import_entry_ids`.
+        """
+        requested_ids = list(self.import_entry_ids or [])
         if self.import_entry_id:
-            for entry in self.entries:
-                if str(entry.id) == str(self.import_entry_id):
-                    # More general way possible?
-                    possible_classes = list(set(_selection_mapping) & set(entry.tags))
-                    if len(possible_classes) == 0:
-                        logger.warning(
-                            'No suitable class found in the LabFolderEntry tags. \
-                            Use one of the following: '
-                            + str(list(_selection_mapping))
-                        )
-                        break
-                    if len(possible_classes) > 1:
-                        logger.warning(
-                            'Too many suitable class found in the LabFolderEntry tags. Use only one of the following: '  # noqa: E501
-                            + str(list(_selection_mapping))  # noqa: E501
-                        )
-                        break
-                    labfolder_section = _selection_mapping[possible_classes[0]]()
-                    logger.info(possible_classes[0] + ' template found.')
-                    data_content = dict()
-                    table_content = []
-                    text_content = dict()
-                    for element in entry.elements:
-                        if element.element_type == 'DATA':
-                            data_content = data_content | element.labfolder_data
-                        if element.element_type == 'TEXT':
-                            text_content = text_content | dict(
-                                {
-                                    TAG_RE.sub(
-                                        '', element.content.split('</p>')[0]
-                                    ): TAG_RE.sub(
-                                        '', ';'.join(element.content.split('</p>')[1:])
-                                    )
-                                }
-                            )
-                        if element.element_type == 'TABLE':
-                            for key in element.content['sheets']:
-                                table = element.content['sheets'][key]['data'][
-                                    'dataTable'
-                                ]
-                                df = pd.DataFrame.from_dict(
-                                    {
-                                        (i): {
-                                            (j): table[i][j]['value']
-                                            for j in table[i].keys()
-                                        }
-                                        for i in table.keys()
-                                    },
-                                    orient='index',
-                                )
-                                df.columns = df.iloc[0]
-                                df = df.iloc[1:].reset_index(drop=True)
-                                df = df.to_dict(orient='index')
-                                df['name'] = element.title
-                                table_content.append(df)
-
-                    for section in inp['Classes'].keys():
-                        logger.info(section)
-                        replist = []
-                        for repcount in range(10):
-                            found = True
-                            if (
-                                inp['Classes'][section]['repeats'] == 'false'
-                                or inp['Classes'][section]['repeats'] == 'true'
-                            ) and repcount > 0:
-                                continue
-                            if (
-                                inp['Classes'][section]['type'] == 'SubSection'
-                                or inp['Classes'][section]['type'] == 'Archive'
-                                or inp['Classes'][section]['type'] == 'main'
-                            ):
-                                if (
-                                    not hasattr(
-                                        labfolder_section,
-                                        inp['Classes'][section]['attribute'],
-                                    )
-                                    and not inp['Classes'][section]['type'] == 'main'
-                                ):  # noqa: E501
-                                    logger.warning(
-                                        'The schema does not have an attribute '
-                                        + inp['Classes'][section]['attribute']
-                                    )  # noqa: E501
-                                    break
-                                if inp['Classes'][section]['type'] == 'SubSection':
-                                    logger.info('Creating Subsection ' + section)
-                                if inp['Classes'][section]['type'] == 'Archive':
-                                    logger.info('Creating Archive ' + section)
-                                if inp['Classes'][section]['type'] == 'main':
-                                    section_object = labfolder_section
-                                else:
-                                    section_object = getattr(
-                                        importlib.import_module(
-                                            '.'.join(
-                                                inp['Classes'][section]['class'].split(
-                                                    '.'
-                                                )[:-1]
-                                            )
-                                        ),
-                                        inp['Classes'][section]['class'].split('.')[-1],
-                                    )()  # noqa: E501
-
-                                # TODO: find better way of interating through a json
-                                maps = inp['Mapping']['Data elements']
-                                for key1 in maps:
-                                    if 'object' in maps[key1]:
-                                        if maps[key1]['object'] == section:
-                                            try:
-                                                setattr(
-                                                    section_object,
-                                                    maps[key1]['key'],
-                                                    ureg.Quantity(
-                                                        float(
-                                                            data_content[key1]['value']
-                                                        ),
-                                                        data_content[key1]['unit'],
-                                                    ),
-                                                )  # noqa: E501
-                                            except Exception:
-                                                try:
-                                                    setattr(
-                                                        section_object,
-                                                        maps[key1]['key'],
-                                                        data_content[key1][
-                                                            'description'
-                                                        ],
-                                                    )
-                                                except Exception as error:
-                                                    logger.warning(
-                                                        'JSON entry with key '
-                                                        + key1
-                                                        + ' could not be parsed with error: '  # noqa: E501
-                                                        + str(error)
-                                                    )  # noqa: E501
-                                                    continue
-                                        continue
-                                    maps1 = maps[key1]
-                                    for key2 in maps1:
-                                        if 'object' in maps1[key2]:
-                                            if maps1[key2]['object'] == section:
-                                                try:
-                                                    setattr(
-                                                        section_object,
-                                                        maps1[key2]['key'],
-                                                        ureg.Quantity(
-                                                            float(
-                                                                data_content[key1][
-                                                                    key2
-                                                                ]['value']
-                                                            ),
-                                                            data_content[key1][key2][
-                                                                'unit'
-                                                            ],
-                                                        ),
-                                                    )  # noqa: E501
-                                                except Exception:
-                                                    try:
-                                                        setattr(
-                                                            section_object,
-                                                            maps1[key2]['key'],
-                                                            data_content[key1][key2][
-                                                                'description'
-                                                            ],
-                                                        )  # noqa: E501
-                                                    except Exception as error:
-                                                        logger.warning(
-                                                            'JSON entry with key '
-                                                            + key1
-                                                            + key2
-                                                            + ' could not be parsed with error: '  # noqa: E501
-                                                            + str(error)
-                                                        )  # noqa: E501
-                                                        continue
-                                            continue
-                                        maps2 = maps1[key2]
-                                        for key3 in maps2:
-                                            if 'object' in maps2[key3]:
-                                                if maps2[key3]['object'] == section:
-                                                    try:
-                                                        setattr(
-                                                            section_object,
-                                                            maps2[key3]['key'],
-                                                            ureg.Quantity(
-                                                                float(
-                                                                    data_content[key1][
-                                                                        key2
-                                                                    ][key3]['value']
-                                                                ),
-                                                                data_content[key1][
-                                                                    key2
-                                                                ][key3]['unit'],
-                                                            ),
-                                                        )  # noqa: E501
-                                                    except Exception:
-                                                        try:
-                                                            setattr(
-                                                                section_object,
-                                                                maps2[key3]['key'],
-                                                                data_content[key1][
-                                                                    key2
-                                                                ][key3]['description'],
-                                                            )  # noqa: E501
-                                                        except Exception as error:
-                                                            logger.warning(
-                                                                'JSON entry with key '
-                                                                + key1
-                                                                + key2
-                                                                + key3
-                                                                + ' could not be parsed with error: '  # noqa: E501
-                                                                + str(error)
-                                                            )  # noqa: E501
-                                                            continue
-                                                    continue
-
-                                maps = inp['Mapping']['Text elements']
-                                for key1 in maps:
-                                    if maps[key1]['object'] == section:
-                                        try:
-                                            setattr(
-                                                section_object,
-                                                maps[key1]['key'],
-                                                text_content[key1],
-                                            )  # noqa: E501
-                                        except Exception as error:
-                                            logger.warning(
-                                                'Text entry with key '
-                                                + key1
-                                                + ' could not be parsed with error: '
-                                                + str(error)
-                                            )  # noqa: E501
-
-                                maps = inp['Mapping']['Table elements']
-                                for key1 in maps:
-                                    for table in table_content:
-                                        if table['name'] == key1:
-                                            try:
-                                                line = table[repcount]
-                                                for key2 in maps[key1]:
-                                                    if (
-                                                        maps[key1][key2]['object']
-                                                        == section
-                                                    ):  # noqa: E501
-                                                        try:
-                                                            setattr(
-                                                                section_object,
-                                                                maps[key1][key2]['key'],
-                                                                line[key2],
-                                                            )
-                                                        except Exception as error:
-                                                            logger.warning(
-                                                                'Text entry with key '
-                                                                + key1
-                                                                + key2
-                                                                + ' could not be parsed with error: '  # noqa: E501
-                                                                + str(error)
-                                                            )  # noqa: E501
-
-                                            except KeyError:
-                                                found = False
-
-                                if inp['Classes'][section]['name'] != '':
-                                    temp = inp['Classes'][section]['name']
-                                    name = ''
-                                    for line in temp.split('+'):
-                                        if line.startswith('LF'):
-                                            if line.startswith('LF.data'):
-                                                add = data_content
-                                                for i in range(
-                                                    len(line.split('.')) - 2
-                                                ):
-                                                    add = add[line.split('.')[i + 2]]
-                                                name = name + add['description']
-                                        else:
-                                            name = name + line
-
-                                    section_object.name = name
-
-                                if inp['Classes'][section]['type'] == 'Archive':
-                                    section_object = create_archive(
-                                        section_object, archive, name
-                                    )
-
-                                if found or repcount == 0:
-                                    replist.append(section_object)
-                                logger.info(section, repcount, replist)
-
-                        if not inp['Classes'][section]['type'] == 'main':
-                            if inp['Classes'][section]['repeats'] == 'false':
-                                setattr(
-                                    labfolder_section,
-                                    inp['Classes'][section]['attribute'],
-                                    replist[0],
-                                )
-                            else:
-                                setattr(
-                                    labfolder_section,
-                                    inp['Classes'][section]['attribute'],
-                                    replist,
-                                )
-
-                    temp = inp['Classes'][possible_classes[0]]['name']
-                    name = ''
-                    for line in temp.split('+'):
-                        if line.startswith('LF'):
-                            if line.startswith('LF.data'):
-                                add = data_content
-                                for i in range(len(line.split('.')) - 2):
-                                    add = add[line.split('.')[i + 2]]
-                                name = name + add['description']
-                        else:
-                            name = name + line
-
-                    labfolder_section.name = name
-
-                    create_archive(labfolder_section, archive, name)
+            requested_ids.append(self.import_entry_id)
+        return {str(entry_id) for entry_id in requested_ids}
+
+    def _is_selected(self, entry_id, tags: list, requested_ids: set) -> bool:
+        return (
+            self.import_all
+            or str(entry_id) in requested_ids
+            or bool(set(self.import_tags or []) & set(tags or []))
+        )
+
+    def _select_entries(self) -> tuple:
+        """
+        Returns the Labfolder entries selected by `import_entry_id`,
+        `import_entry_ids`, `import_tags` and `import_all` in project order,
+        together with the requested ids that are not part of the project.
+        """
+        entries_by_id = {str(entry.id): entry for entry in self.entries}
+        if self.import_all:
+            return list(self.entries), []
+
+        requested_ids = self._requested_ids()
+        missing_ids = sorted(requested_ids - entries_by_id.keys())
+        return [
+            entry
+            for entry in entries_by_id.values()
+            if self._is_selected(entry.id, entry.tags, requested_ids)
+        ], missing_ids
 
 
 m_package.__init_metainfo__()
@@ -0,0 +1,216 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from dateutil.parser import parse as parse_datetime
+from nomad.metainfo import Datetime, MEnum, Reference
+from nomad.metainfo.data_type import ExactNumber, Number, m_str
+from nomad.units import ureg
+
+NUMBER_RE = re.compile(r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$')
+
+
+def parse_number(value) -> Optional[float]:
+    """
+    The value as a float, or `None` if it is not a number.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and NUMBER_RE.match(value):
+        return float(value)
+    return None
+
+
+def _text(node: dict):
+    description = node.get('description')
+    return node.get('value') if description is None else description
+
+
+def _to_auto(node: dict, definition):
+    number = parse_number(node.get('value'))
+    if number is None:
+        return node.get('description')
+    return ureg.Quantity(number, node.get('unit'))
+
+
+def _to_string(node: dict, definition):
+    return node.get('description')
+
+
+def _to_number(node: dict, definition):
+    number = parse_number(node.get('value'))
+    if number is None:
+        raise ValueError('The value ' + repr(node.get('value')) + ' is not a number.')
+    if isinstance(definition.type, ExactNumber) and number.is_integer():
+        number = int(number)
+    unit = node.get('unit')
+    return ureg.Quantity(number, unit) if unit else number
+
+
+def _to_enum(node: dict, definition):
+    text = _text(node)
+    if text not in definition.type:
+        raise ValueError(
+            repr(text) + ' is not one of ' + str(list(definition.type)) + '.'
+        )
+    return text
+
+
+def _to_datetime(node: dict, definition):
+    return parse_datetime(str(_text(node)))
+
+
+def _to_reference(node: dict, definition):
+    text = _text(node)
+    if not text:
+        raise ValueError('The reference is empty.')
+    return str(text)
+
+
+CONVERTERS = {
+    'auto': _to_auto,
+    'string': _to_string,
+    'number': _to_number,
+    'enum': _to_enum,
+    'datetime': _to_datetime,
+    'reference': _to_reference,
+}
+
+
+@dataclass(frozen=True, eq=False)
+class Setter:
+    """
+    How the value of a Labfolder data element is converted for the quantity
+    `definition` it is mapped to. Without a definition ('auto', for classes
+    that are no metainfo sections), numbers with units become quantities and
+    other values their description.
+    """
+
+    kind: str = 'auto'
+    definition: Any = None
+
+    def convert(self, node: dict):
+        return CONVERTERS[self.kind](node, self.definition)
+
+
+AUTO_SETTER = Setter()
+
+
+def units_are_compatible(unit: str, target) -> bool:
+    """
+    Whether values in `unit` can be converted to the unit `target`.
+    """
+    try:
+        return (
+            ureg.Quantity(1, unit).dimensionality
+            == ureg.Quantity(1, target).dimensionality
+        )
+    except Exception:
+        return False
+
+
+def setter_kind(definition) -> str:
+    quantity_type = definition.type
+    if isinstance(quantity_type, Reference):
+        return 'reference'
+    if isinstance(quantity_type, Datetime):
+        return 'datetime'
+    if isinstance(quantity_type, MEnum):
+        return 'enum'
+    if isinstance(quantity_type, Number):
+        return 'number'
+    if isinstance(quantity_type, m_str):
+        return 'string'
+    return 'auto'
+
+
+def compile_setters(section_plan, warnings: list) -> None:
+    """
+    Looks up the quantities of the rules of a mapped class in its metainfo
+    definition and prepares their setters. Rules for keys that are not
+    quantities of the class get no setter and are reported, as are rules
+    whose unit or shape does not fit their quantity.
+    """
+    m_def = getattr(section_plan.section_class, 'm_def', None)
+    if m_def is None:
+        return
+    quantities = m_def.all_quantities
+    for rule in (
+        section_plan.data_rules + section_plan.text_rules + section_plan.table_rules
+    ):
+        definition = quantities.get(rule.key)
+        if definition is None:
+            warnings.append(
+                'The class '
+                + section_plan.name
+                + ' has no quantity '
+                + rule.key
+                + ', the mapping of '
+                + '.'.join(rule.path)
+                + ' is ignored.'
+            )
+            section_plan.setters[rule.key] = None
+            continue
+        kind = setter_kind(definition)
+        if rule in section_plan.text_rules and kind not in ('string', 'auto'):
+            warnings.append(
+                'The text element '
+                + rule.path[0]
+                + ' is mapped to the quantity '
+                + rule.key
+                + ' of '
+                + section_plan.name
+                + ', which does not hold text.'
+            )
+        if rule.columnar and not definition.shape:
+            warnings.append(
+                'The column '
+                + '.'.join(rule.path)
+                + ' is stored in the quantity '
+                + rule.key
+                + ' of '
+                + section_plan.name
+                + ', which is no array.'
+            )
+        if rule.unit and definition.unit is None:
+            warnings.append(
+                'The quantity '
+                + rule.key
+                + ' of '
+                + section_plan.name
+                + ' has no unit, the unit '
+                + rule.unit
+                + ' of '
+                + '.'.join(rule.path)
+                + ' is ignored.'
+            )
+        elif rule.unit and not units_are_compatible(rule.unit, definition.unit):
+            warnings.append(
+                'The unit '
+                + rule.unit
+                + ' of '
+                + '.'.join(rule.path)
+                + ' cannot be converted to the unit '
+                + str(definition.unit)
+                + ' of the quantity '
+                + rule.key
+                + ' of '
+                + section_plan.name
+                + '.'
+            )
+        if (
+            section_plan.repeats == 'per line'
+            and rule in section_plan.table_rules
+            and definition.shape
+        ):
+            warnings.append(
+                'The column '
+                + '.'.join(rule.path)
+                + ' is mapped to the array quantity '
+                + rule.key
+                + ' of '
+                + section_plan.name
+                + ', which repeats per line and gets the whole column in '
+                + 'every line.'
+            )
+        section_plan.setters[rule.key] = Setter(kind, definition)
@@ -0,0 +1,166 @@
+import re
+from typing import Callable, Optional
+
+ENTRY_FIELDS = (
+    'id',
+    'title',
+    'project_id',
+    'author_id',
+    'version_id',
+    'creation_date',
+    'version_date',
+)
+DATE_FIELDS = ('creation_date', 'version_date')
+SPEC_SEPARATOR = '::'
+
+FIELD_RE = re.compile(r'^LF\.(?P<namespace>\w+)\.(?P<path>.+)$')
+
+
+class TemplateError(Exception):
+    pass
+
+
+def _format(value, spec: str, part: str, missing: list) -> str:
+    if not spec:
+        return str(value)
+    for convert in (lambda v: v, int, float):
+        try:
+            return format(convert(value), spec)
+        except (TypeError, ValueError):
+            continue
+    missing.append(part)
+    return str(value)
+
+
+def _is_value_spec(spec: str) -> bool:
+    """
+    Whether the format spec applies to a text or a number, the values of data
+    elements, table cells and entry fields other than dates.
+    """
+    for sample in ('', 0, 0.0):
+        try:
+            format(sample, spec)
+            return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
+def _split_spec(namespace: str, field: str) -> tuple:
+    """
+    Splits a field into its path and the format spec after `SPEC_SEPARATOR`,
+    so that titles and column headers may contain single colons. Entry dates
+    take a strftime format, all other fields a spec valid for text or numbers.
+    """
+    path, _, spec = field.partition(SPEC_SEPARATOR)
+    if not spec:
+        return path, spec
+    if namespace == 'entry' and path in DATE_FIELDS:
+        valid = '%' in spec
+    else:
+        valid = _is_value_spec(spec)
+    if not valid:
+        raise TemplateError(
+            'The format ' + spec + ' cannot be applied to the field ' + path + '.'
+        )
+    return path, spec
+
+
+class NameTemplate:
+    """
+    A compiled archive/section name like 'LF.data.Group.Name+_+LF.row.Index::03d'.
+
+    The '+'-separated parts are either literal strings or fields: `LF.data.<path>`
+    for the description of a data element, `LF.row.<column>` for the current
+    row of the mapped table and `LF.entry.<field>` for the entry metadata. A
+    field may end in '::<format spec>', a strftime format for the entry dates.
+    """
+
+    def __init__(self, template: str, row_allowed: bool = False):
+        self.template = template or ''
+        self.row_columns = set()
+        self.data_paths = set()
+        self._parts = []
+        if not template:
+            return
+        for part in template.split('+'):
+            self._parts.append(self._compile_part(part, row_allowed))
+
+    def __bool__(self) -> bool:
+        return bool(self._parts)
+
+    def _compile_part(self, part: str, row_allowed: bool) -> Callable:
+        if not part.startswith('LF.'):
+            return lambda context, missing: part
+
+        match = FIELD_RE.match(part)
+        if not match:
+            raise TemplateError('The name part ' + part + ' is not a valid field.')
+        namespace = match.group('namespace')
+        path, spec = _split_spec(namespace, match.group('path'))
+        keys = tuple(path.split('.'))
+        if not all(keys):
+            raise TemplateError('The name part ' + part + ' has an empty key.')
+
+        if namespace == 'data':
+            self.data_paths.add(keys)
+
+            def render(context, missing):
+                value = context['data'].get(keys)
+                if value is None or value.get('description') is None:
+                    missing.append(part)
+                    return ''
+                return _format(value['description'], spec, part, missing)
+
+        elif namespace == 'row':
+            if not row_allowed:
+                raise TemplateError(
+                    'The name part ' + part + ' needs a class repeating per line.'
+                )
+            self.row_columns.add(path)
+
+            def render(context, missing):
+                value = (context.get('row') or dict()).get(path)
+                if value is None:
+                    missing.append(part)
+                    return ''
+                return _format(value, spec, part, missing)
+
+        elif namespace == 'entry':
+            if path not in ENTRY_FIELDS:
+                raise TemplateError(
+                    'The name part '
+                    + part
+                    + ' uses an unknown entry field. Use one of '
+                    + str(list(ENTRY_FIELDS))
+                    + '.'
+                )
+
+            def render(context, missing):
+                value = getattr(context['entry'], path, None)
+                if value is None:
+                    missing.append(part)
+                    return ''
+                return _format(value, spec, part, missing)
+
+        else:
+            raise TemplateError(
+                'The name part ' + part + ' has the unknown namespace ' + namespace
+            )
+        return render
+
+    def render(
+        self,
+        data_index: dict,
+        entry=None,
+        row: Optional[dict] = None,
+        missing: Optional[list] = None,
+    ) -> str:
+        """
+        Builds the name. Fields without a value are left empty and their parts
+        are appended to `missing`.
+        """
+        context = dict(data=data_index, entry=entry, row=row)
+        if missing is None:
+            missing = []
+        return ''.join(render(context, missing) for render in self._parts)
@@ -0,0 +1,108 @@
+import json
+from typing import Optional
+
+from nomad.datamodel.context import ClientContext
+from nomad_material_processing.utils import (
+    get_entry_id_from_file_name,
+    get_reference,
+)
+
+
+class ArchiveNameCollision(Exception):
+    pass
+
+
+class ArchiveWriter:
+    """
+    Collects the archives created by an import and writes them together on
+    `flush`. Every file name can be claimed by one entry only. Existing files
+    are only replaced if they are in `owned`, the files written by previous
+    runs of the import, or with `replace_existing`, and are not written again
+    if their content is identical.
+    """
+
+    def __init__(self, archive, owned=(), replace_existing: bool = False):
+        self.archive = archive
+        self.written = []
+        self.unchanged = []
+        self._owned = set(owned)
+        self._replace_existing = replace_existing
+        self._pending = dict()
+        self._owners = dict()
+
+    def reserve(self, file_names: list, owner: str) -> None:
+        """
+        Claims the file names for the entry `owner`. Raises an
+        `ArchiveNameCollision` without claiming any name if one of them is
+        already used in this import, or is an existing file of the upload that
+        was not written by the import.
+        """
+        context = self.archive.m_context
+        claimed = set()
+        for file_name in file_names:
+            if file_name in claimed or file_name in self._owners:
+                raise ArchiveNameCollision(
+                    'The archive name '
+                    + file_name
+                    + ' is already used by entry '
+                    + self._owners.get(file_name, owner)
+                    + '.'
+                )
+            if (
+                not self._replace_existing
+                and file_name not in self._owned
+                and not isinstance(context, ClientContext)
+                and context.raw_path_exists(file_name)
+            ):
+                raise ArchiveNameCollision(
+                    'The archive name '
+                    + file_name
+                    + ' is already used by a file of the upload.'
+                )
+            claimed.add(file_name)
+        for file_name in file_names:
+            self._owners[file_name] = owner
+
+    def add(self, section, file_name: str) -> Optional[str]:
+        """
+        Buffers the section to be written as archive `file_name` and returns
+        the reference to it.
+        """
+        if isinstance(self.archive.m_context, ClientContext):
+            return None
+        self._pending[file_name] = section
+        return get_reference(
+            self.archive.metadata.upload_id,
+            get_entry_id_from_file_name(file_name, self.archive),
+        )
+
+    def flush(self) -> dict:
+        """
+        Serializes and writes all buffered archives, then triggers their
+        processing. Returns the errors by the owning entry of the archives
+        that could not be written.
+        """
+        context = self.archive.m_context
+        pending, self._pending = self._pending, dict()
+        errors = dict()
+        written = []
+        for file_name, section in pending.items():
+            try:
+                content = json.dumps({'data': section.m_to_dict(with_root_def=True)})
+                if context.raw_path_exists(file_name):
+                    with context.raw_file(file_name, 'r') as f:
+                        if f.read() == content:
+                            self.unchanged.append(file_name)
+                            continue
+                with context.raw_file(file_name, 'w') as f:
+                    f.write(content)
+                written.append(file_name)
+            except Exception as error:
+                errors.setdefault(self._owners.get(file_name, file_name), str(error))
+        for file_name in written:
+            try:
+                context.process_updated_raw_file(file_name, allow_modify=True)
+            except Exception as error:
+                errors.setdefault(self._owners.get(file_name, file_name), str(error))
+        self.written.extend(written)
+        return errors
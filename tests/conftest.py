@@ -0,0 +1,371 @@
+import io
+import json
+import os
+from contextlib import contextmanager
+
+import pytest
+import yaml
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.metainfo.eln.labfolder import (
+    LabfolderDataElement,
+    LabfolderEntry,
+    LabfolderTableElement,
+    LabfolderTextElement,
+)
+
+from labfolder_plugin.fake_labfolder import FakeLabfolder
+from labfolder_plugin.schema_packages.mapping import class_registry
+from labfolder_plugin.schema_packages.schema_package import LabFolderImport
+
+EXAMPLE_SCHEMA_DIR = os.path.join('labfolder_general')
+EXAMPLE_MAP = os.path.join(
+    'labfolder_general', 'labfolder_example_schema', 'example_map.yaml'
+)
+SYNTHETIC_SCHEMA_DIR = os.path.join('tests', 'data')
+ELEMENT_PATHS = {'DATA': 'data', 'TEXT': 'text', 'TABLE': 'table'}
+
+
+class StubContext:
+    """
+    An in-memory stand-in for the upload context of an archive, holding the
+    raw files written during normalization. Without `keep_content`, only the
+    names of written files are kept, as for an upload on disk.
+    """
+
+    def __init__(self, files=None, keep_content=True):
+        self.files = dict(files or {})
+        self.keep_content = keep_content
+        self.processed = []
+
+    @contextmanager
+    def raw_file(self, path, mode='r'):
+        if 'w' in mode:
+            buffer = io.BytesIO() if 'b' in mode else io.StringIO()
+            yield buffer
+            self.files[path] = buffer.getvalue() if self.keep_content else ''
+            return
+        content = self.files[path]
+        if 'b' in mode:
+            yield io.BytesIO(
+                content if isinstance(content, bytes) else content.encode()
+            )
+        else:
+            yield io.StringIO(
+                content.decode() if isinstance(content, bytes) else content
+            )
+
+    def raw_path_exists(self, path):
+        return path in self.files
+
+    def process_updated_raw_file(self, path, allow_modify=False):
+        self.processed.append(path)
+
+
+def _data_group(depth, index):
+    group = {
+        'Deep value': {'value': str(index), 'unit': 'mm', 'description': str(index)}
+    }
+    for level in range(depth):
+        group = {f'Level {level}': group}
+    return group
+
+
+def _table(title, rows):
+    data_table = {
+        '0': {'0': {'value': 'Element name'}, '1': {'value': 'element value'}}
+    }
+    for row in range(1, rows + 1):
+        data_table[str(row)] = {
+            '0': {'value': f'{title} row {row}'},
+            '1': {'value': str(row * 0.5)},
+        }
+    return {'sheets': {'Sheet1': {'data': {'dataTable': data_table}}}}
+
+
+def make_synthetic_entry(  # noqa: PLR0913, PLR0917
+    index,
+    data_elements=1,
+    text_elements=1,
+    table_elements=1,
+    table_rows=10,
+    depth=1,
+):
+    """
+    Builds a Labfolder entry shaped like the example entry of
+    labfolder_general, scaled by the given numbers of elements and rows.
+    """
+    elements = [
+        LabfolderDataElement(
+            element_type='DATA',
+            labfolder_data={
+                'The first quantity': {
+                    'value': str(index),
+                    'unit': 'mm',
+                    'description': 'first',
+                },
+                'Archive value': {'value': '1.5', 'unit': 's', 'description': ''},
+                'To show nesting': {
+                    'The second quantity': {
+                        'value': None,
+                        'unit': None,
+                        'description': f'entry {index}',
+                    },
+                    'Archive name': {
+                        'value': None,
+                        'unit': None,
+                        'description': f'archive_{index}',
+                    },
+                },
+                'Nested': _data_group(depth, index),
+            },
+        )
+    ]
+    for number in range(1, data_elements):
+        elements.append(
+            LabfolderDataElement(
+                element_type='DATA',
+                labfolder_data={
+                    f'Extra {number}': {
+                        'value': str(number),
+                        'unit': 'mm',
+                        'description': '',
+                    }
+                },
+            )
+        )
+    for number in range(text_elements):
+        title = 'Text entry' if number == 0 else f'Text {number}'
+        elements.append(
+            LabfolderTextElement(
+                element_type='TEXT',
+                content=f'<p>{title}</p>' + '<p>Some <b>text</b> &amp; more</p>' * 5,
+            )
+        )
+    for number in range(table_elements):
+        title = 'Entries in the table' if number == 0 else f'Table {number}'
+        elements.append(
+            LabfolderTableElement(
+                element_type='TABLE', title=title, content=_table(title, table_rows)
+            )
+        )
+    return LabfolderEntry(
+        id=str(index),
+        title=f'Entry {index}',
+        tags=['LabFolderImportExample'],
+        elements=elements,
+    )
+
+
+def make_synthetic_mapping(depth=1, extra_sections=0):
+    """
+    The example mapping file, extended by a rule for the nested data group
+    and by sections mapping the additional tables. Every entry gets its own
+    archive, and every additional table its own sub-section of
+    `labfolder_synthetic_schema.SyntheticImport`.
+    """
+    with open(EXAMPLE_MAP) as f:
+        mapping = yaml.safe_load(f)
+    main = mapping['Classes']['LabFolderImportExample']
+    main['name'] = 'LabFolderImportExample_+LF.entry.id+.archive.json'
+    if extra_sections:
+        main['class'] = 'labfolder_synthetic_schema.SyntheticImport'
+
+    rule = {'object': 'LabFolderImportExample', 'key': 'quantity_2'}
+    group = {'Deep value': rule}
+    for level in range(depth):
+        group = {f'Level {level}': group}
+    mapping['Mapping']['Data elements']['Nested'] = group
+
+    for number in range(1, extra_sections + 1):
+        section = f'RepeatingSub{number}'
+        mapping['Classes'][section] = dict(
+            mapping['Classes']['RepeatingSub'], attribute=f'from_table_{number}'
+        )
+        mapping['Mapping']['Table elements'][f'Table {number}'] = {
+            'Element name': {'object': section, 'key': 'name'},
+            'element value': {'object': section, 'key': 'value'},
+        }
+    return mapping
+
+
+def _data_elements(labfolder_data):
+    items = []
+    for title, value in labfolder_data.items():
+        if any(isinstance(child, dict) for child in value.values()):
+            items.append(
+                dict(
+                    type='DATA_ELEMENT_GROUP',
+                    title=title,
+                    children=_data_elements(value),
+                )
+            )
+        else:
+            items.append(dict(type='SINGLE_DATA_ELEMENT', title=title, **value))
+    return items
+
+
+def make_api_project(entries):
+    """
+    The responses of the Labfolder API for the given entries, all in project 1,
+    as served by `FakeLabfolder`.
+    """
+    api_entries = []
+    elements = dict()
+    for entry in entries:
+        stubs = []
+        for number, element in enumerate(entry.elements):
+            element_id = f'{entry.id}-{number}'
+            path = f'{ELEMENT_PATHS[element.element_type]}/{element_id}/version/1'
+            content = dict(
+                id=element_id, version_id='1', element_type=element.element_type
+            )
+            if element.element_type == 'DATA':
+                content['data_elements'] = _data_elements(element.labfolder_data)
+            elif element.element_type == 'TEXT':
+                content['content'] = element.content
+            else:
+                content.update(title=element.title, content=element.content)
+            elements[path] = content
+            stubs.append(dict(id=element_id, type=element.element_type, version_id='1'))
+        api_entries.append(
+            dict(
+                id=entry.id,
+                version_id='1',
+                project_id='1',
+                title=entry.title,
+                tags=list(entry.tags),
+                elements=stubs,
+            )
+        )
+    return api_entries, elements
+
+
+@pytest.fixture
+def example_schema(monkeypatch):
+    """
+    Makes the example schema of labfolder_general and the synthetic schema of
+    the benchmarks and conversion tests importable.
+    """
+    monkeypatch.syspath_prepend(EXAMPLE_SCHEMA_DIR)
+    monkeypatch.syspath_prepend(SYNTHETIC_SCHEMA_DIR)
+    class_registry.clear()
+    yield
+    class_registry.clear()
+
+
+@pytest.fixture
+def stub_archive():
+    """
+    An archive of an upload whose raw files are kept in memory.
+    """
+    return EntryArchive(
+        metadata=EntryMetadata(upload_id='stub_upload'), m_context=StubContext()
+    )
+
+
+@pytest.fixture
+def synthetic_import(example_schema):
+    """
+    Returns a factory for an archive with a `LabFolderImport` of a synthetic
+    project, ready to be normalized without network access.
+    """
+
+    def factory(entries=1, depth=1, extra_sections=0, table_elements=1, **entry_kwargs):
+        mapping = make_synthetic_mapping(depth, extra_sections)
+        context = StubContext({'mapping.yaml': yaml.safe_dump(mapping)})
+        archive = EntryArchive(
+            metadata=EntryMetadata(
+                upload_id='synthetic_upload', mainfile='import.archive.json'
+            ),
+            m_context=context,
+        )
+        archive.data = LabFolderImport(
+            project_url='http://labfolder.test/eln/notebook#?projectIds=1',
+            mapping_file='mapping.yaml',
+            import_all=True,
+            force_reimport=True,
+            entries=[
+                make_synthetic_entry(
+                    index,
+                    table_elements=table_elements + extra_sections,
+                    depth=depth,
+                    **entry_kwargs,
+                )
+                for index in range(entries)
+            ],
+        )
+        return archive
+
+    return factory
+
+
+@pytest.fixture
+def fake_labfolder():
+    """
+    Returns a factory for a running `FakeLabfolder` serving a synthetic project.
+    """
+    servers = []
+
+    def factory(entries=1, latency=0.0, failures=0, **entry_kwargs):
+        project = make_api_project(
+            [make_synthetic_entry(index, **entry_kwargs) for index in range(entries)]
+        )
+        servers.append(
+            FakeLabfolder(*project, latency=latency, failures=failures).start()
+        )
+        return servers[-1]
+
+    yield factory
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def project_import(example_schema):
+    """
+    Returns a factory for an archive with a `LabFolderImport` of all entries of
+    the Labfolder project at `project_url`, mapped with the synthetic mapping.
+    """
+
+    def factory(project_url, **kwargs):
+        kwargs.setdefault('import_all', True)
+        mapping = yaml.safe_dump(make_synthetic_mapping())
+        archive = EntryArchive(
+            metadata=EntryMetadata(
+                upload_id='project_upload', mainfile='import.archive.json'
+            ),
+            m_context=StubContext({'mapping.yaml': mapping}),
+        )
+        archive.data = LabFolderImport(
+            project_url=project_url,
+            labfolder_email='user@labfolder.test',
+            password='secret',
+            mapping_file='mapping.yaml',
+            **kwargs,
+        )
+        return archive
+
+    return factory
+
+
+@pytest.fixture
+def reprocess():
+    """
+    Returns a function building a new archive of an import from the mainfile
+    it wrote to its upload, as when the upload is processed again.
+    """
+
+    def reprocess(archive):
+        context = archive.m_context
+        with context.raw_file(archive.metadata.mainfile) as f:
+            data = json.load(f)['data']
+        return EntryArchive(
+            metadata=EntryMetadata(
+                upload_id=archive.metadata.upload_id,
+                mainfile=archive.metadata.mainfile,
+            ),
+            m_context=context,
+            data=LabFolderImport.m_from_dict(data),
+        )
+
+    return reprocess
@@ -0,0 +1,80 @@
+import numpy as np
+from labfolder_example_schema import LabfolderImportExample, RepeatFromTable
+from nomad.metainfo import (
+    MEnum,
+    MSection,
+    Package,
+    Quantity,
+    SubSection,
+)
+
+m_package = Package(name='LabFolder Synthetic Import')
+
+
+class SyntheticImport(LabfolderImportExample):
+    """
+    The example import with a sub-section for each additional table of the
+    synthetic entries.
+    """
+
+    from_table_1 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_2 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_3 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_4 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_5 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_6 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_7 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_8 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_9 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_10 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_11 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_12 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_13 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_14 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_15 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_16 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_17 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_18 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_19 = SubSection(section_def=RepeatFromTable, repeats=True)
+    from_table_20 = SubSection(section_def=RepeatFromTable, repeats=True)
+
+
+class Row(MSection):
+    value = Quantity(type=str)
+    mass = Quantity(type=np.float64, unit='g')
+
+
+class LineWithArray(MSection):
+    label = Quantity(type=str)
+    masses = Quantity(type=np.float64, shape=['*'], unit='g')
+    length = Quantity(type=np.float64, unit='m')
+    width = Quantity(type=np.float64, unit='m')
+
+
+class Columns(MSection):
+    mass = Quantity(type=np.float64, shape=['*'], unit='g')
+
+
+class Sample(MSection):
+    """
+    The main section of the conversion tests, with a sub-section for each way
+    a table can be stored.
+    """
+
+    name = Quantity(type=str)
+    masses = Quantity(type=np.float64, shape=['*'], unit='g')
+    counts = Quantity(type=np.int64, shape=['*'])
+    rows = SubSection(section_def=Row, repeats=True)
+    lines = SubSection(section_def=LineWithArray, repeats=True)
+    columns = SubSection(section_def=Columns)
+
+
+class Measurement(MSection):
+    name = Quantity(type=str)
+    label = Quantity(type=str)
+    mass = Quantity(type=np.float64, unit='g')
+    count = Quantity(type=int)
+    state = Quantity(type=MEnum('solid', 'liquid'))
+
+
+m_package.__init_metainfo__()
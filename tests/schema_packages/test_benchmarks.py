@@ -0,0 +1,77 @@
+import tracemalloc
+
+import pytest
+import structlog
+
+from labfolder_plugin.schema_packages import (
+    NewSchemaPackageEntryPoint,
+    schema_package,
+)
+
+SCENARIOS = {
+    'example': dict(),
+    'many_entries': dict(entries=50),
+    'many_elements': dict(data_elements=100, text_elements=50, table_elements=10),
+    'long_tables': dict(table_rows=1000),
+    'deep_nesting': dict(depth=25),
+    'many_sections': dict(extra_sections=20),
+}
+
+
+@pytest.mark.benchmark(group='normalize')
+@pytest.mark.parametrize('scenario', list(SCENARIOS))
+def test_normalize_benchmark(benchmark, synthetic_import, scenario):
+    logger = structlog.get_logger()
+
+    def setup():
+        return (synthetic_import(**SCENARIOS[scenario]),), dict()
+
+    def normalize(archive):
+        archive.data.normalize(archive, logger)
+        return archive
+
+    args, _ = setup()
+    tracemalloc.start()
+    normalize(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info['peak_memory_mb'] = peak / 1024**2
+
+    archive = benchmark.pedantic(normalize, setup=setup, rounds=3)
+
+    assert {result.status for result in archive.data.import_results} == {'success'}
+
+
+FETCH_MODES = {
+    'sequential': dict(),
+    'cached': dict(fetch_cache_dir='cache'),
+    'concurrent': dict(fetch_workers=8, fetch_page_size=5),
+}
+
+
+@pytest.mark.benchmark(group='fetch')
+@pytest.mark.parametrize('mode', list(FETCH_MODES))
+def test_fetch_benchmark(  # noqa: PLR0913, PLR0917
+    benchmark, fake_labfolder, project_import, tmp_path, monkeypatch, mode
+):
+    labfolder = fake_labfolder(entries=10, latency=0.005)
+    options = dict(FETCH_MODES[mode])
+    if 'fetch_cache_dir' in options:
+        options['fetch_cache_dir'] = str(tmp_path / options['fetch_cache_dir'])
+    monkeypatch.setattr(
+        schema_package,
+        'configuration',
+        NewSchemaPackageEntryPoint(name='benchmark', **options),
+    )
+    logger = structlog.get_logger()
+
+    def setup():
+        return (project_import(labfolder.project_url()),), dict()
+
+    def normalize(archive):
+        archive.data.normalize(archive, logger)
+        return archive
+
+    archive = benchmark.pedantic(normalize, setup=setup, rounds=3)
+
+    assert {result.status for result in archive.data.import_results} == {'success'}
@@ -0,0 +1,43 @@
+import numpy as np
+from nomad.metainfo import MSection, Quantity
+
+from labfolder_plugin.schema_packages.columns import convert_column, to_float_array
+
+
+class Measurement(MSection):
+    label = Quantity(type=str)
+    mass = Quantity(type=np.float64, unit='g')
+    count = Quantity(type=np.int64)
+    weight = Quantity(type=np.int64, unit='g')
+
+
+def test_to_float_array_masks_invalid_cells():
+    array, valid = to_float_array(['1.5', None, 'n/a', '2'])
+
+    assert array[[0, 3]].tolist() == [1.5, 2.0]
+    assert valid.tolist() == [True, False, False, True]
+
+
+def test_convert_column_converts_units_per_column():
+    quantities = Measurement.m_def.all_quantities
+
+    masses, valid = convert_column(['1', '2.5', ''], quantities['mass'], 'mg')
+    counts, _ = convert_column(['3', '4'], quantities['count'])
+    labels, _ = convert_column(['a', None], quantities['label'])
+
+    assert np.allclose(masses[valid], [0.001, 0.0025])
+    assert valid.tolist() == [True, True, False]
+    assert counts.dtype == np.int64
+    assert labels == ['a', None]
+
+
+def test_convert_column_rejects_fractions_for_integer_quantities():
+    quantities = Measurement.m_def.all_quantities
+
+    counts, valid = convert_column(['3', '2.7', 'n/a'], quantities['count'])
+    weights, weights_valid = convert_column(['250', '3000'], quantities['weight'], 'mg')
+
+    assert counts[valid].tolist() == [3]
+    assert valid.tolist() == [True, False, False]
+    assert weights[weights_valid].tolist() == [3]
+    assert weights_valid.tolist() == [False, True]
@@ -0,0 +1,357 @@
+from types import SimpleNamespace
+
+import numpy as np
+import structlog
+
+from labfolder_plugin.schema_packages.conversion import (
+    convert_entries,
+    fingerprint_entry,
+)
+from labfolder_plugin.schema_packages.mapping import compile_mapping
+
+MAPPING = {
+    'Classes': {
+        'Sample': {
+            'class': 'types.SimpleNamespace',
+            'type': 'main',
+            'attribute': '',
+            'repeats': 'false',
+            'name': 'LF.data.Name+.archive.json',
+        },
+    },
+    'Mapping': {
+        'Data elements': {
+            'Name': {'object': 'Sample', 'key': 'sample_name'},
+        },
+    },
+}
+
+
+SCHEMA = 'labfolder_synthetic_schema.'
+
+
+def make_entry(index, tags=('Sample',)):
+    element = SimpleNamespace(
+        element_type='DATA',
+        labfolder_data={
+            'Name': {'value': None, 'unit': None, 'description': f'sample_{index}'}
+        },
+    )
+    return SimpleNamespace(
+        id=str(index), title=f'Entry {index}', tags=list(tags), elements=[element]
+    )
+
+
+def table_entry(tag, header, rows):
+    """
+    An entry with the given tag and a single table element 'Table', whose
+    first row holds the `header` and every further row one of the `rows`.
+    """
+    data_table = {
+        str(index): {str(column): {'value': value} for column, value in enumerate(row)}
+        for index, row in enumerate([header, *rows])
+    }
+    element = SimpleNamespace(
+        element_type='TABLE',
+        title='Table',
+        content={'sheets': {'Sheet1': {'data': {'dataTable': data_table}}}},
+    )
+    return SimpleNamespace(id='1', title='', tags=[tag], elements=[element])
+
+
+def schema_class(name, attribute='', repeats='false'):
+    """
+    The mapping of a class of the synthetic schema: a main class named `name`
+    or, with an `attribute`, a sub-section.
+    """
+    return {
+        'class': SCHEMA + name,
+        'type': 'SubSection' if attribute else 'main',
+        'attribute': attribute,
+        'repeats': repeats,
+        'name': '' if attribute else name.lower(),
+    }
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def __getattr__(self, level):
+        return lambda event, *args, **kwargs: self.events.append((level, event))
+
+
+def test_convert_entries_keeps_order():
+    plan = compile_mapping(MAPPING)
+    entries = [make_entry(index) for index in range(20)]
+    entries.append(make_entry(20, tags=()))
+
+    conversions = convert_entries(entries, plan, structlog.get_logger())
+
+    assert [c.entry_id for c in conversions] == [str(i) for i in range(21)]
+    assert conversions[0].name == 'sample_0.archive.json'
+    assert conversions[0].section.sample_name == 'sample_0'
+    assert [c.status for c in conversions][-2:] == ['success', 'skipped']
+
+
+def test_incomplete_archive_name_fails_the_entry():
+    plan = compile_mapping(MAPPING)
+    entry = make_entry(1)
+    entry.elements[0].labfolder_data = {}
+
+    logger = RecordingLogger()
+    (conversion,) = convert_entries([entry], plan, logger)
+
+    assert conversion.status == 'failed'
+    assert 'LF.data.Name' in conversion.message
+    assert conversion.section is None
+    errors = [event for level, event in logger.events if level == 'error']
+    assert errors == [conversion.message]
+
+
+def test_only_the_main_class_of_the_entry_is_mapped():
+    mapping = {
+        'Classes': {
+            'Sample': MAPPING['Classes']['Sample'],
+            'Instrument': dict(
+                MAPPING['Classes']['Sample'], name='LF.data.Code+.archive.json'
+            ),
+        },
+        'Mapping': {
+            'Data elements': {
+                'Name': {'object': 'Sample', 'key': 'sample_name'},
+                'Code': {'object': 'Instrument', 'key': 'code'},
+            },
+        },
+    }
+    plan = compile_mapping(mapping)
+
+    (conversion,) = convert_entries([make_entry(1)], plan, structlog.get_logger())
+
+    assert conversion.status == 'success'
+    assert conversion.name == 'sample_1.archive.json'
+    assert not hasattr(conversion.section, 'code')
+
+
+def test_per_line_repeats_follow_table_length(example_schema):
+    mapping = {
+        'Classes': {
+            'Sample': schema_class('Sample'),
+            'Row': schema_class('Row', 'rows', 'per line'),
+        },
+        'Mapping': {
+            'Table elements': {'Table': {'value': {'object': 'Row', 'key': 'value'}}}
+        },
+    }
+    plan = compile_mapping(mapping)
+    entry = table_entry('Sample', ['value'], [[str(i)] for i in range(1, 26)])
+
+    (conversion,) = convert_entries([entry], plan, structlog.get_logger())
+
+    assert [row.value for row in conversion.section.rows] == [
+        str(i) for i in range(1, 26)
+    ]
+
+
+def test_fingerprint_entry_changes_with_content_and_mapping():
+    plan = compile_mapping(MAPPING, digest='a')
+    other_plan = compile_mapping(MAPPING, digest='b')
+
+    fingerprint = fingerprint_entry(make_entry(1), plan)
+
+    assert fingerprint == fingerprint_entry(make_entry(1), plan)
+    assert fingerprint != fingerprint_entry(make_entry(2), plan)
+    assert fingerprint != fingerprint_entry(make_entry(1), other_plan)
+    new_version = make_entry(1)
+    new_version.version_id = '2'
+    assert fingerprint != fingerprint_entry(new_version, plan)
+    renamed = make_entry(1)
+    renamed.title = 'Renamed'
+    assert fingerprint != fingerprint_entry(renamed, plan)
+
+
+def test_instrumented_conversion_counts_elements_and_fields():
+    plan = compile_mapping(MAPPING)
+    missing = dict(MAPPING)
+    missing['Mapping'] = {
+        'Data elements': {
+            'Name': {'object': 'Sample', 'key': 'sample_name'},
+            'Missing': {'object': 'Sample', 'key': 'other'},
+        }
+    }
+
+    logger = structlog.get_logger()
+    (conversion,) = convert_entries([make_entry(1)], plan, logger, instrument=True)
+    (uninstrumented,) = convert_entries([make_entry(1)], plan, logger)
+    (failing,) = convert_entries(
+        [make_entry(1)], compile_mapping(missing), logger, instrument=True
+    )
+
+    assert conversion.metrics.counters == {'elements.DATA': 1, 'fields_mapped': 1}
+    assert set(conversion.metrics.durations) == {'flatten', 'setattr', 'tables'}
+    assert not uninstrumented.metrics.counters
+    assert not uninstrumented.metrics.durations
+    disabled = uninstrumented.metrics
+    assert disabled.phase('setattr') is disabled.phase('tables')
+    assert failing.metrics.counters['fields_failed'] == 1
+
+
+def test_numeric_table_columns_are_converted_per_column(example_schema):
+    mapping = {
+        'Classes': {
+            'Sample': schema_class('Sample'),
+            'Row': schema_class('Row', 'rows', 'per line'),
+        },
+        'Mapping': {
+            'Table elements': {
+                'Table': {
+                    'mass': {'object': 'Row', 'key': 'mass', 'unit': 'mg'},
+                    'all masses': {'object': 'Sample', 'key': 'masses'},
+                }
+            }
+        },
+    }
+    plan = compile_mapping(mapping)
+    rows = [['100', '1'], ['n/a', '2'], ['300', '3']]
+    entry = table_entry('Sample', ['mass', 'all masses'], rows)
+
+    (conversion,) = convert_entries(
+        [entry], plan, structlog.get_logger(), instrument=True
+    )
+
+    masses = [row.mass for row in conversion.section.rows]
+    assert masses[1] is None
+    assert np.allclose([masses[0].magnitude, masses[2].magnitude], [0.1, 0.3])
+    assert conversion.section.masses.magnitude.tolist() == [1.0, 2.0, 3.0]
+    assert conversion.metrics.counters['fields_failed'] == 1
+
+
+def test_compile_setters_warns_about_units_and_arrays_that_do_not_fit(example_schema):
+    mapping = {
+        'Classes': {
+            'Sample': schema_class('Sample'),
+            'Line': schema_class('LineWithArray', 'lines', 'per line'),
+        },
+        'Mapping': {
+            'Table elements': {
+                'Table': {
+                    'label': {'object': 'Line', 'key': 'label', 'unit': 'mg'},
+                    'mass': {'object': 'Line', 'key': 'masses'},
+                    'length': {'object': 'Line', 'key': 'length', 'unit': 'mg'},
+                    'width': {'object': 'Line', 'key': 'width', 'unit': 'mm'},
+                }
+            }
+        },
+    }
+    plan = compile_mapping(mapping)
+
+    warnings = plan.take_warnings()
+    assert any('label of Line has no unit' in w for w in warnings)
+    assert any('array quantity masses of Line' in w for w in warnings)
+    assert any(
+        'unit mg of Table.length cannot be converted to the unit meter' in w
+        for w in warnings
+    )
+    assert not any('Table.width' in w for w in warnings)
+
+
+def test_invalid_cells_of_array_columns_are_reported(example_schema):
+    mapping = {
+        'Classes': {'Sample': schema_class('Sample')},
+        'Mapping': {
+            'Table elements': {
+                'Table': {
+                    'mass': {'object': 'Sample', 'key': 'masses'},
+                    'count': {'object': 'Sample', 'key': 'counts'},
+                }
+            }
+        },
+    }
+    plan = compile_mapping(mapping)
+    rows = [[value, value] for value in ['3', '', 'n/a', '2.7']]
+    entry = table_entry('Sample', ['mass', 'count'], rows)
+
+    logger = RecordingLogger()
+    (conversion,) = convert_entries([entry], plan, logger, instrument=True)
+
+    masses = conversion.section.masses.magnitude
+    assert masses[[0, 3]].tolist() == [3.0, 2.7]
+    assert np.isnan(masses[[1, 2]]).all()
+    assert conversion.section.counts is None
+    assert conversion.metrics.counters['fields_failed'] == 5  # noqa: PLR2004
+    warnings = [event for _, event in logger.events]
+    assert (
+        'Table entries with key Tablemass in rows 2, 3 are empty or not a number.'
+    ) in warnings
+    assert (
+        'Table entries with key Tablecount in rows 2, 3, 4 are empty or not a number.'
+    ) in warnings
+
+
+def test_data_elements_are_set_with_the_setter_of_their_quantity(example_schema):
+    mapping = {
+        'Classes': {'Measurement': schema_class('Measurement')},
+        'Mapping': {
+            'Data elements': {
+                key: {'object': 'Measurement', 'key': key}
+                for key in ('label', 'mass', 'count', 'state', 'other')
+            }
+        },
+    }
+    plan = compile_mapping(mapping)
+    element = SimpleNamespace(
+        element_type='DATA',
+        labfolder_data={
+            'label': {'value': None, 'unit': None, 'description': 'sample 1'},
+            'mass': {'value': '250', 'unit': 'mg', 'description': None},
+            'count': {'value': '3', 'unit': None, 'description': None},
+            'state': {'value': None, 'unit': None, 'description': 'gaseous'},
+            'other': {'value': '1', 'unit': None, 'description': None},
+        },
+    )
+    entry = SimpleNamespace(id='1', title='', tags=['Measurement'], elements=[element])
+
+    (conversion,) = convert_entries(
+        [entry], plan, structlog.get_logger(), instrument=True
+    )
+
+    measurement = conversion.section
+    assert measurement.label == 'sample 1'
+    assert np.isclose(measurement.mass.to('g').magnitude, 0.25)
+    assert measurement.count == 3  # noqa: PLR2004
+    assert measurement.state is None
+    assert plan.sections['Measurement'].setters['other'] is None
+    assert conversion.metrics.counters['fields_mapped'] == 3  # noqa: PLR2004
+    assert conversion.metrics.counters['fields_failed'] == 1
+
+
+def test_large_tables_are_stored_as_columns(example_schema):
+    mapping = {
+        'Classes': {
+            'Sample': schema_class('Sample'),
+            'Row': schema_class('Row', 'rows', 'per line'),
+            'Columns': schema_class('Columns', 'columns'),
+        },
+        'Mapping': {
+            'Table elements': {
+                'Table': {'mass': {'object': 'Row', 'key': 'mass', 'unit': 'mg'}}
+            },
+            'Table storage': {'Table': {'columns': 'Columns', 'min_rows': 3}},
+        },
+    }
+    plan = compile_mapping(mapping)
+
+    def convert(rows):
+        entry = table_entry(
+            'Sample', ['mass'], [[str(i * 100)] for i in range(1, rows + 1)]
+        )
+        (conversion,) = convert_entries([entry], plan, structlog.get_logger())
+        return conversion.section
+
+    small = convert(2)
+    large = convert(4)
+
+    assert len(small.rows) == 2  # noqa: PLR2004
+    assert small.columns is None
+    assert not large.rows
+    assert np.allclose(large.columns.mass.magnitude, [0.1, 0.2, 0.3, 0.4])
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+from labfolder_plugin.schema_packages.elements import (
+    ElementCollector,
+    LabfolderTable,
+    TextView,
+    index_data_content,
+)
+
+
+def test_index_data_content_arbitrary_depth():
+    leaf = {'value': '1', 'unit': 'mm', 'description': 'deep'}
+    data_content = {
+        'Top': {'value': '2', 'unit': None, 'description': 'top'},
+        'A': {'B': {'C': {'D': leaf}}},
+    }
+
+    index = index_data_content(data_content)
+
+    assert index[('A', 'B', 'C', 'D')] == leaf
+    assert index[('Top',)]['description'] == 'top'
+    assert ('A', 'B') in index
+
+
+def test_labfolder_table_rows_sorted_numerically():
+    data_table = {
+        '10': {'0': {'value': 'c'}, '1': {'value': '3'}},
+        '0': {'0': {'value': 'name'}, '1': {'value': 'value'}, '2': {'value': 'x'}},
+        '2': {'1': {'value': '1'}, '0': {'value': 'a'}, '2': {'value': 'unused'}},
+    }
+
+    table = LabfolderTable('Table', data_table, columns={'name', 'value'})
+
+    assert list(table) == [{'name': 'a', 'value': '1'}, {'name': 'c', 'value': '3'}]
+    assert table.column('value') == ['1', '3']
+    assert table.column('x') == [None, None]
+
+
+def test_element_collector_records_collisions():
+    collector = ElementCollector()
+    for element in [
+        SimpleNamespace(element_type='DATA', labfolder_data={'A': {'value': '1'}}),
+        SimpleNamespace(element_type='DATA', labfolder_data={'A': {'value': '2'}}),
+        SimpleNamespace(element_type='TEXT', content='<p>Notes</p><p>first</p>'),
+    ]:
+        collector.add(element)
+
+    assert collector.data == {'A': {'value': '2'}}
+    assert collector.collisions == [('DATA', 'A')]
+    assert collector.texts['Notes'].body() == 'first'
+
+
+def test_text_view_formats():
+    text = TextView(
+        '<p>Title &amp; more</p><p>Some <b>bold</b> text</p><ul><li>item</li></ul>'
+    )
+
+    assert text.title == 'Title & more'
+    assert text.body() == 'Some bold text;item'
+    assert text.body('paragraphs') == 'Some bold text\n\nitem'
+    assert text.body('markdown') == 'Some **bold** text\n\n- item'
+    assert text.markdown_paragraphs is text.markdown_paragraphs
+
+
+def test_element_collector_skips_unreferenced_elements():
+    sheet = {
+        '0': {'0': {'value': 'name'}, '1': {'value': 'aux'}},
+        '1': {'0': {'value': 'a'}, '1': {'value': '1'}},
+    }
+    auxiliary = {'0': {'0': {'value': 'aux'}}, '1': {'0': {'value': '2'}}}
+    collector = ElementCollector(
+        table_columns={'Table': {'name'}},
+        data_paths={('Group',), ('Group', 'Name')},
+        text_titles={'Notes'},
+    )
+    for element in [
+        SimpleNamespace(
+            element_type='DATA',
+            labfolder_data={'Group': {'Name': {'value': '1'}}, 'Other': {}},
+        ),
+        SimpleNamespace(element_type='TEXT', content='<p>Notes</p><p>first</p>'),
+        SimpleNamespace(element_type='TEXT', content='<p>Log</p><p>long</p>'),
+        SimpleNamespace(
+            element_type='TABLE',
+            title='Table',
+            content={
+                'sheets': {
+                    'Sheet1': {'data': {'dataTable': sheet}},
+                    'Sheet2': {'data': {'dataTable': auxiliary}},
+                }
+            },
+        ),
+        SimpleNamespace(element_type='TABLE', title='Raw data', content=None),
+    ]:
+        collector.add(element)
+
+    assert list(collector.data) == ['Group']
+    assert list(collector.texts) == ['Notes']
+    assert [table.column('name') for table in collector.tables['Table']] == [['a']]
+    assert collector.skipped == {
+        'DATA': 1,
+        'TEXT': 1,
+        'COLUMN': 1,
+        'SHEET': 1,
+        'TABLE': 1,
+    }
+    index = index_data_content(
+        {'Group': {'Name': {'value': '1'}, 'Unused': {'value': '2'}}},
+        paths=collector.data_paths,
+    )
+    assert list(index) == [('Group',), ('Group', 'Name')]
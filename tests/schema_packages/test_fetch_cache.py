@@ -0,0 +1,90 @@
+import pytest
+import requests
+import structlog
+from nomad.datamodel.metainfo.eln.labfolder import LabfolderImportError
+
+from labfolder_plugin.schema_packages import (
+    NewSchemaPackageEntryPoint,
+    schema_package,
+)
+from labfolder_plugin.schema_packages.fetch_cache import FetchCacheMiss, ResponseCache
+
+
+def test_response_cache_refetches_conditionally(fake_labfolder, tmp_path):
+    labfolder = fake_labfolder(entries=2)
+    headers = {'Authorization': 'Token ' + labfolder.token}
+    base = labfolder.url + '/api/v2'
+
+    def fetcher(url):
+        def fetch(conditions):
+            return requests.get(base + url, headers={**headers, **conditions})
+
+        return fetch
+
+    cache = ResponseCache(str(tmp_path))
+    entries_url = '/entries?project_ids=1'
+    element_url = '/elements/data/0-0/version/1'
+    for _ in range(2):
+        entries = cache.get(base + entries_url, fetcher(entries_url))
+        element = cache.get(base + element_url, fetcher(element_url))
+
+    assert [entry['id'] for entry in entries.json()] == ['0', '1']
+    assert element.json()['element_type'] == 'DATA'
+    assert labfolder.requests['GET /entries'] == 2  # noqa: PLR2004
+    assert labfolder.requests['GET ' + element_url] == 1
+
+    offline = ResponseCache(str(tmp_path), offline=True)
+    assert offline.get(base + element_url, None).json() == element.json()
+    with pytest.raises(FetchCacheMiss):
+        offline.get(base + '/elements/data/0-1/version/1', None)
+    other_account = ResponseCache(str(tmp_path), offline=True, account='other')
+    with pytest.raises(FetchCacheMiss):
+        other_account.get(base + element_url, None)
+
+
+def test_response_cache_does_not_store_downloads(tmp_path):
+    url = 'https://labfolder.example/api/v2/elements/file/1/download'
+    fetched = []
+
+    def fetch(conditions):
+        fetched.append(conditions)
+        return requests.Response()
+
+    cache = ResponseCache(str(tmp_path))
+    for _ in range(2):
+        cache.get(url, fetch)
+
+    assert fetched == [dict(), dict()]
+    assert not list(tmp_path.iterdir())
+    with pytest.raises(FetchCacheMiss):
+        ResponseCache(str(tmp_path), offline=True).get(url, None)
+
+
+def test_normalize_replays_cached_project(
+    fake_labfolder, project_import, tmp_path, monkeypatch
+):
+    labfolder = fake_labfolder(entries=3)
+
+    def normalize(offline, password='secret'):
+        monkeypatch.setattr(
+            schema_package,
+            'configuration',
+            NewSchemaPackageEntryPoint(
+                name='test', fetch_cache_dir=str(tmp_path), fetch_offline=offline
+            ),
+        )
+        archive = project_import(labfolder.project_url())
+        archive.data.password = password
+        archive.data.normalize(archive, structlog.get_logger())
+        return archive
+
+    online = normalize(offline=False)
+    requests_online = sum(labfolder.requests.values())
+    offline = normalize(offline=True)
+
+    assert sum(labfolder.requests.values()) == requests_online
+    assert len(offline.data.entries) == len(online.data.entries)
+    assert [result.status for result in offline.data.import_results] == ['success'] * 3
+
+    with pytest.raises(LabfolderImportError):
+        normalize(offline=True, password='guessed')
@@ -0,0 +1,184 @@
+import json
+import tracemalloc
+
+import structlog
+
+from labfolder_plugin.schema_packages import (
+    NewSchemaPackageEntryPoint,
+    schema_package,
+)
+from labfolder_plugin.schema_packages.fetching import (
+    fetch_project,
+    iter_project,
+    pooled_session,
+)
+
+
+def test_fetch_project_pages_and_retries(fake_labfolder):
+    labfolder = fake_labfolder(entries=5, failures=2)
+    session = pooled_session(max_workers=4, retries=3, backoff=0)
+    headers = {'Authorization': 'Token ' + labfolder.token}
+
+    def api_method(url):
+        response = session.get(labfolder.url + '/api/v2' + url, headers=headers)
+        response.raise_for_status()
+        return response
+
+    def load_element(element):
+        url = f'/elements/data/{element["id"]}/version/{element["version_id"]}'
+        return element['id'] if element['type'] != 'DATA' else api_method(url).json()
+
+    project = fetch_project(api_method, ['1'], load_element, max_workers=4, page_size=2)
+
+    assert [entry['id'] for entry, _ in project] == ['0', '1', '2', '3', '4']
+    assert project[0][1][0]['element_type'] == 'DATA'
+    assert labfolder.requests['GET /entries'] == 3  # noqa: PLR2004
+    assert labfolder.failures == 0
+
+
+def test_concurrent_fetch_matches_sequential_fetch(
+    fake_labfolder, project_import, monkeypatch
+):
+    labfolder = fake_labfolder(entries=5)
+    logger = structlog.get_logger()
+
+    def normalize(fetch_workers):
+        monkeypatch.setattr(
+            schema_package,
+            'configuration',
+            NewSchemaPackageEntryPoint(
+                name='test', fetch_workers=fetch_workers, fetch_page_size=2
+            ),
+        )
+        archive = project_import(labfolder.project_url())
+        archive.data.normalize(archive, logger)
+        return archive.data
+
+    sequential = normalize(fetch_workers=1)
+    concurrent = normalize(fetch_workers=4)
+
+    assert concurrent.m_to_dict()['entries'] == sequential.m_to_dict()['entries']
+    assert [result.status for result in concurrent.import_results] == ['success'] * 5
+    assert labfolder.requests['POST /auth/login'] == 2  # noqa: PLR2004
+
+
+def test_iter_project_fetches_entries_on_demand(fake_labfolder):
+    labfolder = fake_labfolder(entries=5)
+    session = pooled_session(max_workers=1, retries=0, backoff=0)
+    headers = {'Authorization': 'Token ' + labfolder.token}
+
+    def api_method(url):
+        return session.get(labfolder.url + '/api/v2' + url, headers=headers)
+
+    project = iter_project(api_method, ['1'], lambda element: element['id'], 1, 2)
+    entry, elements = next(project)
+
+    assert entry['id'] == '0'
+    assert elements == ['0-0', '0-1', '0-2']
+    assert labfolder.requests['GET /entries'] == 1
+    assert [entry['id'] for entry, _ in project] == ['1', '2', '3', '4']
+    assert labfolder.requests['GET /entries'] == 3  # noqa: PLR2004
+
+
+class NullLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_streaming_import_memory_is_bounded_by_the_largest_entry(
+    fake_labfolder, project_import
+):
+    def peak_memory(entries):
+        labfolder = fake_labfolder(entries=entries, text_elements=10, table_rows=500)
+        archive = project_import(labfolder.project_url(), streaming_import=True)
+        archive.m_context.keep_content = False
+        tracemalloc.start()
+        archive.data.normalize(archive, NullLogger())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results = archive.data.import_results
+        assert [result.status for result in results] == ['success'] * entries
+        assert not any(entry.elements for entry in archive.data.entries)
+        return peak
+
+    # Four times the entries may only add the entries kept without elements.
+    assert peak_memory(12) < 1.5 * peak_memory(3)  # noqa: PLR2004
+
+
+def test_import_after_streaming_fetches_the_elements_again(
+    fake_labfolder, project_import, reprocess
+):
+    labfolder = fake_labfolder(entries=3)
+    archive = project_import(labfolder.project_url(), streaming_import=True)
+    archive.data.normalize(archive, NullLogger())
+
+    def statuses():
+        return [result.status for result in archive.data.import_results]
+
+    archive = reprocess(archive)
+    assert archive.data.entries_streamed
+    archive.data.streaming_import = False
+    archive.data.normalize(archive, NullLogger())
+    assert statuses() == ['success'] * 3
+    assert not any(entry.elements for entry in archive.data.entries)
+
+    archive.data.labfolder_email = 'user@labfolder.test'
+    archive.data.password = 'secret'
+    archive.data.normalize(archive, NullLogger())
+    assert statuses() == ['unchanged'] * 3
+    assert all(entry.elements for entry in archive.data.entries)
+    with archive.m_context.raw_file(archive.metadata.mainfile) as f:
+        mainfile = json.load(f)['data']
+    assert not mainfile.get('entries_streamed')
+    assert not mainfile.get('password')
+
+    archive = reprocess(archive)
+    archive.data.normalize(archive, NullLogger())
+    assert statuses() == ['unchanged'] * 3
+    assert all(entry.elements for entry in archive.data.entries)
+
+
+def test_streaming_import_loads_only_the_selected_entries(
+    fake_labfolder, project_import
+):
+    labfolder = fake_labfolder(entries=3)
+    archive = project_import(
+        labfolder.project_url(), streaming_import=True, import_all=False
+    )
+    archive.data.import_entry_id = '1'
+    archive.data.normalize(archive, NullLogger())
+
+    results = archive.data.import_results
+    assert [(result.entry_id, result.status) for result in results] == [
+        ('1', 'success')
+    ]
+    assert [entry.id for entry in archive.data.entries] == ['0', '1', '2']
+    element_requests = [
+        request for request in labfolder.requests if request.startswith('GET /elem')
+    ]
+    assert element_requests
+    assert all('/1-' in request for request in element_requests)
+
+
+class WarningLogger(NullLogger):
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, event, *args, **kwargs):
+        self.warnings.append(event)
+
+
+def test_streaming_import_of_a_fetched_project_is_reported(
+    fake_labfolder, project_import, reprocess
+):
+    labfolder = fake_labfolder(entries=1)
+    archive = project_import(labfolder.project_url(), streaming_import=True)
+    archive.data.normalize(archive, NullLogger())
+
+    archive = reprocess(archive)
+    request_count = len(labfolder.requests)
+    logger = WarningLogger()
+    archive.data.normalize(archive, logger)
+
+    assert len(labfolder.requests) == request_count
+    assert any('resync_labfolder_repository' in event for event in logger.warnings)
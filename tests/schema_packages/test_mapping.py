@@ -0,0 +1,139 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from labfolder_plugin.schema_packages.mapping import (
+    ClassRegistry,
+    MappingError,
+    compile_mapping,
+)
+from labfolder_plugin.schema_packages.setters import parse_number
+
+EXAMPLE_MAP = os.path.join(
+    'labfolder_general', 'labfolder_example_schema', 'example_map.yaml'
+)
+
+
+@pytest.fixture
+def example_mapping():
+    with open(EXAMPLE_MAP) as f:
+        return yaml.safe_load(f)
+
+
+def test_compile_example_mapping(example_mapping):
+    plan = compile_mapping(example_mapping)
+
+    assert list(plan.sections) == [
+        'LabFolderImportExample',
+        'RepeatingSub',
+        'TableColumns',
+        'ArchiveReference',
+    ]
+    archive_rules = plan.sections['ArchiveReference'].data_rules
+    assert [(rule.path, rule.key) for rule in archive_rules] == [
+        (('Archive value',), 'value'),
+        (('To show nesting', 'Archive name'), 'name'),
+    ]
+    assert [rule.path for rule in plan.sections['RepeatingSub'].table_rules] == [
+        ('Entries in the table', 'Element name'),
+        ('Entries in the table', 'element value'),
+    ]
+
+
+def test_compile_rejects_unknown_target(example_mapping):
+    example_mapping['Mapping']['Text elements']['Text entry']['object'] = 'Missing'
+
+    with pytest.raises(MappingError):
+        compile_mapping(example_mapping)
+
+
+def test_class_registry_caches_missing_classes():
+    registry = ClassRegistry()
+
+    cls, warning = registry.resolve('labfolder_missing_module.Missing')
+    assert cls is None
+    assert 'was not found' in warning
+    assert registry.resolve('labfolder_missing_module.Missing') == (None, warning)
+    assert registry.resolve('types.SimpleNamespace')[0] is SimpleNamespace
+
+
+def test_compile_rejects_archive_without_name(example_mapping):
+    example_mapping['Classes']['ArchiveReference']['name'] = ''
+
+    with pytest.raises(MappingError):
+        compile_mapping(example_mapping)
+
+
+def test_compile_warnings_are_taken_once(example_mapping):
+    example_mapping['Classes']['RepeatingSub']['class'] = 'labfolder_missing.Missing'
+    plan = compile_mapping(example_mapping)
+
+    assert 'The module labfolder_missing was not found.' in plan.take_warnings()
+    assert plan.take_warnings() == []
+
+
+def test_compile_checks_mapped_keys_against_the_schema(example_mapping, example_schema):
+    example_mapping['Mapping']['Data elements']['Archive value']['key'] = 'missing'
+    plan = compile_mapping(example_mapping)
+
+    setters = plan.sections['ArchiveReference'].setters
+    assert setters['missing'] is None
+    assert setters['name'].kind == 'string'
+    assert any('has no quantity missing' in w for w in plan.take_warnings())
+
+
+def test_compile_checks_attributes_against_all_main_classes(
+    example_mapping, example_schema
+):
+    example_mapping['Classes']['Separate'] = {
+        'class': 'labfolder_example_schema.SeparateArchive',
+        'type': 'main',
+        'attribute': '',
+        'repeats': 'false',
+        'name': 'separate.archive.json',
+    }
+    plan = compile_mapping(example_mapping)
+    assert not any('attribute' in w for w in plan.take_warnings())
+    assert plan.sections['RepeatingSub'].main_classes == {'LabFolderImportExample'}
+
+    example_mapping['Classes']['RepeatingSub']['attribute'] = 'missing'
+    plan = compile_mapping(example_mapping)
+    assert any('an attribute missing' in w for w in plan.take_warnings())
+
+
+@pytest.mark.parametrize(
+    'value, number',
+    [('1.5', 1.5), (' -2e3 ', -2000.0), (4, 4.0), ('1,5', None), (True, None)],
+)
+def test_parse_number(value, number):
+    assert parse_number(value) == number
+
+
+def test_compile_collects_referenced_elements(example_mapping):
+    plan = compile_mapping(example_mapping)
+
+    assert plan.text_titles == {'Text entry'}
+    assert ('To show nesting',) in plan.data_paths
+    assert ('To show nesting', 'Archive name') in plan.data_paths
+    assert plan.table_columns['Entries in the table'] == {
+        'Element name',
+        'element value',
+    }
+
+
+def test_compile_table_storage(example_mapping):
+    plan = compile_mapping(example_mapping)
+
+    assert plan.table_storage == {'Entries in the table': 100}
+    columns = plan.sections['TableColumns']
+    assert columns.columnar_tables == {'Entries in the table'}
+    assert [(rule.key, rule.columnar) for rule in columns.table_rules] == [
+        ('name', True),
+        ('value', True),
+    ]
+
+    example_mapping['Classes']['TableColumns']['repeats'] = 'per line'
+    with pytest.raises(MappingError):
+        compile_mapping(example_mapping)
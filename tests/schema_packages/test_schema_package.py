@@ -1,3 +1,6 @@
+import structlog
+
+
 def test_schema_package():
     pass
 
@@ -7,3 +10,139 @@ def test_schema_package():
 #    normalize_all(entry_archive)
 
 # assert entry_archive.data.message == 'Hello Markus!'
+
+
+def test_unchanged_entries_are_not_imported_again(synthetic_import, reprocess):
+    archive = synthetic_import(entries=2)
+    archive.data.force_reimport = False
+    logger = structlog.get_logger()
+
+    def normalize(**changes):
+        nonlocal archive
+        for name, value in changes.items():
+            setattr(archive.data, name, value)
+        archive.data.normalize(archive, logger)
+        statuses = [result.status for result in archive.data.import_results]
+        archive = reprocess(archive)
+        return statuses
+
+    assert normalize() == ['success', 'success']
+    assert normalize() == ['unchanged', 'unchanged']
+    assert normalize(force_reimport=True) == ['success', 'success']
+
+    files = archive.m_context.files
+    del files[archive.data.import_results[1].archive_name]
+    assert normalize(force_reimport=False) == ['unchanged', 'success']
+
+    separate_files = [
+        name
+        for name in archive.data.import_results[0].archive_files
+        if name != archive.data.import_results[0].archive_name
+    ]
+    assert separate_files
+    del files[separate_files[0]]
+    assert normalize() == ['success', 'unchanged']
+
+    archive.data.entries[0].version_id = '2'
+    assert normalize() == ['success', 'unchanged']
+
+
+def test_results_are_kept_when_the_upload_is_processed_again(
+    synthetic_import, reprocess
+):
+    archive = synthetic_import(entries=2)
+    archive.data.force_reimport = False
+    logger = structlog.get_logger()
+    archive.data.normalize(archive, logger)
+
+    archive = reprocess(archive)
+    archive.data.entries[0].version_id = '2'
+    archive.data.normalize(archive, logger)
+
+    results = archive.data.import_results
+    assert [result.status for result in results] == ['success', 'unchanged']
+    assert all(result.archive_files for result in results)
+
+
+def test_archives_without_results_are_only_replaced_by_force(
+    synthetic_import, reprocess
+):
+    archive = synthetic_import(entries=1)
+    logger = structlog.get_logger()
+    archive.data.normalize(archive, logger)
+
+    # The mainfile of an import by a plugin version that did not record the
+    # archives it wrote.
+    archive = reprocess(archive)
+    archive.data.import_results = []
+    archive.data.owned_archive_files = []
+    archive.data.force_reimport = False
+    archive.data.normalize(archive, logger)
+    assert [result.status for result in archive.data.import_results] == ['failed']
+
+    archive.data.force_reimport = True
+    archive.data.normalize(archive, logger)
+    assert [result.status for result in archive.data.import_results] == ['success']
+
+
+def test_deselected_entries_keep_their_archives(synthetic_import, reprocess):
+    archive = synthetic_import(entries=2)
+    archive.data.force_reimport = False
+    archive.data.import_all = False
+    logger = structlog.get_logger()
+
+    def normalize(entry_ids):
+        nonlocal archive
+        archive.data.import_entry_ids = entry_ids
+        archive.data.normalize(archive, logger)
+        outcomes = [
+            (result.entry_id, result.status) for result in archive.data.import_results
+        ]
+        archive = reprocess(archive)
+        return outcomes
+
+    assert normalize(['0', '1']) == [('0', 'success'), ('1', 'success')]
+    assert normalize(['0']) == [('0', 'unchanged')]
+    assert normalize(['0', '1']) == [('0', 'unchanged'), ('1', 'success')]
+
+
+def import_outcomes(archive):
+    archive.data.normalize(archive, structlog.get_logger())
+    return [(result.entry_id, result.status) for result in archive.data.import_results]
+
+
+def test_entries_are_selected_by_id(synthetic_import):
+    archive = synthetic_import(entries=3)
+    archive.data.import_all = False
+    archive.data.import_entry_id = '1'
+    archive.data.import_entry_ids = ['2', '7']
+
+    assert import_outcomes(archive) == [
+        ('7', 'failed'),
+        ('1', 'success'),
+        ('2', 'success'),
+    ]
+    assert archive.data.import_results[0].message == (
+        'Entry not found in the Labfolder project.'
+    )
+
+
+def test_entries_are_selected_by_tag(synthetic_import):
+    archive = synthetic_import(entries=3)
+    archive.data.import_all = False
+    archive.data.import_tags = ['LabFolderImportExample']
+    archive.data.entries[0].tags = ['Other']
+
+    assert import_outcomes(archive) == [('1', 'success'), ('2', 'success')]
+
+
+def test_import_all_reports_unsuitable_tags(synthetic_import):
+    archive = synthetic_import(entries=3)
+    archive.data.entries[0].tags = ['Other']
+    archive.data.entries[1].tags = ['LabFolderImportExample', 'RepeatingSub']
+
+    assert import_outcomes(archive) == [
+        ('0', 'skipped'),
+        ('1', 'failed'),
+        ('2', 'success'),
+    ]
@@ -0,0 +1,119 @@
+import subprocess
+import sys
+
+import pytest
+
+LOAD_SCHEMA = (
+    'from labfolder_plugin.schema_packages import schema_package_entry_point\n'
+    'schema_package_entry_point.load()\n'
+)
+
+# The modules schema_package.py imports from NOMAD and other dependencies.
+LOAD_DEPENDENCIES = (
+    'import requests\n'
+    'from nomad.config import config\n'
+    'import nomad.datamodel.data\n'
+    'import nomad.datamodel.metainfo.annotations\n'
+    'import nomad.datamodel.metainfo.eln.labfolder\n'
+    'import nomad.metainfo\n'
+    "config.get_plugin_entry_point('"
+    "labfolder_plugin.schema_packages:schema_package_entry_point')\n"
+)
+
+# Loaded by the import process only, not when the schema package is loaded.
+DEFERRED_MODULES = (
+    'labfolder_plugin.schema_packages.columns',
+    'labfolder_plugin.schema_packages.conversion',
+    'labfolder_plugin.schema_packages.elements',
+    'labfolder_plugin.schema_packages.fetch_cache',
+    'labfolder_plugin.schema_packages.fetching',
+    'labfolder_plugin.schema_packages.instrumentation',
+    'labfolder_plugin.schema_packages.mapping',
+    'labfolder_plugin.schema_packages.setters',
+    'labfolder_plugin.schema_packages.templates',
+    'labfolder_plugin.schema_packages.writer',
+    'nomad_material_processing.utils',
+)
+
+# Seconds loading the schema may add to the import of its dependencies.
+PLUGIN_IMPORT_BUDGET = 0.5
+
+
+def import_times(statement: str) -> dict:
+    """
+    Runs `statement` in a new interpreter with `-X importtime` and returns the
+    self and cumulative import time in seconds of every imported module.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = dict()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:') :].split('|')
+        times[name.strip()] = (int(self_time) / 1e6, int(cumulative) / 1e6)
+    return times
+
+
+def imported_modules(statement: str, setup: str = '') -> set:
+    """
+    Runs `setup` and then `statement` in a new interpreter and returns the
+    names of the modules `statement` added to `sys.modules`.
+    """
+    process = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'import sys\n'
+            + setup
+            + 'before = set(sys.modules)\n'
+            + statement
+            + 'print(*sorted(set(sys.modules) - before), sep=chr(10))\n',
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(process.stdout.split())
+
+
+def test_loading_the_schema_defers_the_import_process():
+    modules = imported_modules(LOAD_SCHEMA)
+
+    assert 'labfolder_plugin.schema_packages.schema_package' in modules
+    assert not [name for name in DEFERRED_MODULES if name in modules]
+
+
+def test_loading_the_schema_adds_little_to_its_dependencies():
+    dependencies = import_times(LOAD_DEPENDENCIES)
+    times = import_times(LOAD_SCHEMA)
+
+    # Everything the schema imports beyond its dependencies, with the
+    # modules they pull in, e.g. pandas imported at the top of a module.
+    added = {
+        name: self_time
+        for name, (self_time, _) in times.items()
+        if name not in dependencies
+    }
+    assert not [name for name in added if not name.startswith('labfolder_plugin')]
+    assert sum(added.values()) < PLUGIN_IMPORT_BUDGET
+
+
+@pytest.mark.parametrize(
+    'attribute, module',
+    [
+        ('conversion.convert_entries', 'labfolder_plugin.schema_packages.conversion'),
+        ('writer.ArchiveWriter', 'nomad_material_processing.utils'),
+    ],
+)
+def test_import_process_is_loaded_on_first_use(attribute, module):
+    setup = (
+        LOAD_SCHEMA + 'from labfolder_plugin.schema_packages import schema_package\n'
+    )
+
+    assert module not in imported_modules(setup)
+    assert module in imported_modules('schema_package.' + attribute + '\n', setup)
@@ -0,0 +1,59 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from labfolder_plugin.schema_packages.templates import NameTemplate, TemplateError
+
+
+def test_name_template_fields():
+    template = NameTemplate(
+        'LF.entry.creation_date::%Y%m%d+_+LF.data.Group.Name+_+LF.row.Index::03d',
+        row_allowed=True,
+    )
+    data_index = {('Group', 'Name'): {'description': 'sample'}}
+    entry = SimpleNamespace(creation_date=datetime(2024, 5, 1))
+
+    name = template.render(data_index, entry, row={'Index': '7'})
+
+    assert name == '20240501_sample_007'
+    assert template.row_columns == {'Index'}
+
+
+def test_name_template_missing_values():
+    template = NameTemplate('LF.data.Missing+.archive.json')
+    missing = []
+
+    assert template.render({}, missing=missing) == '.archive.json'
+    assert missing == ['LF.data.Missing']
+
+
+def test_name_template_titles_with_colons():
+    template = NameTemplate(
+        'LF.data.Time: start+_+LF.data.Run:2+_+LF.data.Ratio 1:2::.1f'
+    )
+    data_index = {
+        ('Time: start',): {'description': 'noon'},
+        ('Run:2',): {'description': 'second'},
+        ('Ratio 1:2',): {'description': '0.25'},
+    }
+
+    assert template.render(data_index) == 'noon_second_0.2'
+    assert template.data_paths == {('Time: start',), ('Run:2',), ('Ratio 1:2',)}
+
+
+@pytest.mark.parametrize(
+    'template',
+    [
+        'LF.unknown.field',
+        'LF.entry.colour',
+        'LF.row.Index',
+        'LF.data.a..b',
+        'LF.entry.id::invalid',
+        'LF.entry.creation_date::03d',
+        'LF.data.Name::not a spec',
+    ],
+)
+def test_name_template_invalid(template):
+    with pytest.raises(TemplateError):
+        NameTemplate(template)
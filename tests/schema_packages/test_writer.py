@@ -0,0 +1,59 @@
+import pytest
+from nomad.metainfo import MSection, Quantity
+
+from labfolder_plugin.schema_packages.writer import ArchiveNameCollision, ArchiveWriter
+
+
+class Sample(MSection):
+    name = Quantity(type=str)
+
+
+def test_writer_writes_in_batch_and_skips_identical_files(stub_archive):
+    context = stub_archive.m_context
+    writer = ArchiveWriter(stub_archive)
+    writer.reserve(['a.archive.json', 'b.archive.json'], '1')
+
+    reference = writer.add(Sample(name='a'), 'a.archive.json')
+    writer.add(Sample(name='b'), 'b.archive.json')
+
+    assert reference.startswith('../uploads/stub_upload/archive/')
+    assert not context.files
+    assert writer.flush() == {}
+    assert context.processed == ['a.archive.json', 'b.archive.json']
+
+    writer = ArchiveWriter(stub_archive, owned=['a.archive.json', 'b.archive.json'])
+    writer.reserve(['a.archive.json', 'b.archive.json'], '1')
+    writer.add(Sample(name='a'), 'a.archive.json')
+    writer.add(Sample(name='changed'), 'b.archive.json')
+    writer.flush()
+
+    assert writer.unchanged == ['a.archive.json']
+    assert writer.written == ['b.archive.json']
+    assert 'changed' in context.files['b.archive.json']
+
+
+def test_writer_detects_name_collisions(stub_archive):
+    writer = ArchiveWriter(stub_archive)
+    writer.reserve(['a.archive.json'], '1')
+
+    with pytest.raises(ArchiveNameCollision, match='entry 1'):
+        writer.reserve(['b.archive.json', 'a.archive.json'], '2')
+    with pytest.raises(ArchiveNameCollision):
+        writer.reserve(['c.archive.json', 'c.archive.json'], '3')
+    writer.reserve(['b.archive.json'], '2')
+
+
+def test_writer_only_replaces_files_of_previous_imports(stub_archive):
+    context = stub_archive.m_context
+    context.files['own.archive.json'] = '{}'
+    context.files['other.archive.json'] = '{}'
+    writer = ArchiveWriter(stub_archive, owned=['own.archive.json'])
+
+    with pytest.raises(ArchiveNameCollision, match='file of the upload'):
+        writer.reserve(['new.archive.json', 'other.archive.json'], '1')
+    writer.reserve(['new.archive.json', 'own.archive.json'], '1')
+    writer.add(Sample(name='own'), 'own.archive.json')
+    assert writer.flush() == {}
+
+    assert context.files['other.archive.json'] == '{}'
+    assert 'own' in context.files['own.archive.json']